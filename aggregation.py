@@ -0,0 +1,92 @@
+from array import array
+from typing import Any, Dict, List
+
+from columnar import EventColumns
+
+
+class FocusStreaks:
+    """Tracks runs of consecutive meeting/work_related rows in timestamp order"""
+
+    def __init__(self):
+        self.durations = []
+        self.current_start = None
+        self.last_us = None
+        self.last_duration = 0
+
+    def add(self, ts_us: int, focused: bool, duration: float):
+        if focused:
+            if self.current_start is None:
+                self.current_start = ts_us
+        else:
+            if self.current_start is not None:
+                dur = (ts_us - self.current_start) / 1_000_000
+                if dur > 0:
+                    self.durations.append(dur)
+                self.current_start = None
+        self.last_us = ts_us
+        self.last_duration = duration
+
+    def finish(self) -> List[float]:
+        # An open streak runs to the start of the last row, plus that row's bin
+        if self.current_start is not None:
+            dur = (self.last_us - self.current_start) / 1_000_000
+            if dur > 0:
+                self.durations.append(dur + self.last_duration)
+            self.current_start = None
+        return self.durations
+
+
+def aggregate_meeting_rows(cols: EventColumns) -> Dict[str, Any]:
+    """
+    Group columnar window_events by user and category in a single pass over
+    time-ordered rows: global and per-user totals, category durations, focus
+    streaks, and each user's row indices for the per-user timeline.
+    """
+    category_names = cols.categories.values
+    focused_codes = {cols.category_code(c) for c in ("meeting", "work_related")} - {None}
+
+    total_duration_sec = 0
+    cat_durations = {}
+    focus = FocusStreaks()
+    users = {}
+
+    start_us, duration, user_codes, categories = cols.start_us, cols.duration, cols.user, cols.category
+    for i in range(len(cols)):
+        ts_us = start_us[i]
+        dur = duration[i]
+        cat = categories[i]
+        focused = cat in focused_codes
+
+        user = users.get(user_codes[i])
+        if user is None:
+            user = users[user_codes[i]] = {
+                "indices": array("i"),
+                "total_duration_sec": 0,
+                "engaged_duration_sec": 0,
+                "category_durations": {},
+                "focus": FocusStreaks()
+            }
+
+        total_duration_sec += dur
+        cat_durations[cat] = cat_durations.get(cat, 0.0) + dur
+        focus.add(ts_us, focused, dur)
+
+        user["indices"].append(i)
+        user["total_duration_sec"] += dur
+        if focused:
+            user["engaged_duration_sec"] += dur
+        user["category_durations"][cat] = user["category_durations"].get(cat, 0.0) + dur
+        user["focus"].add(ts_us, focused, dur)
+
+    by_user_id = {}
+    for code, user in users.items():
+        user["category_durations"] = {category_names[c]: d for c, d in user["category_durations"].items()}
+        user["focus_durations"] = user.pop("focus").finish()
+        by_user_id[cols.users.values[code]] = user
+
+    return {
+        "total_duration_sec": total_duration_sec,
+        "category_durations": {category_names[c]: d for c, d in cat_durations.items()},
+        "focus_durations": focus.finish(),
+        "users": by_user_id
+    }
@@ -1,80 +1,143 @@
 import socket
+import sys
+import json
+import logging
+import threading
+import time
 from aw_client import ActivityWatchClient
 from aw_core.models import Event
 from datetime import datetime, timedelta, timezone
 import ollama  
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, islice
+from typing import Iterator
 import os
 from dotenv import load_dotenv
 from supabase import create_client
 
+from binning import StreamingBinner
+from category_cache import CategorizationCache, DEFAULT_CACHE_PATH
+from category_rules import CompiledRuleset, DEFAULT_RULES_PATH
+from metrics import (
+    ANALYSIS_EVENTS, ANALYSIS_SECONDS, ANALYSIS_STAGE_SECONDS, FAILED_BATCHES, LLM_REQUEST_SECONDS,
+    LLM_REQUESTS, REGISTRY, ROWS_WRITTEN, StageTimer, cache_collector
+)
+from rollups import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
 HOSTNAME = socket.gethostname()
 WINDOW_BUCKET = f"aw-watcher-window_{HOSTNAME}"
 AFK_BUCKET = f"aw-watcher-afk_{HOSTNAME}"
 
 #Before Restructure
 
-client = ActivityWatchClient("meeting-focus-client", testing=False)
-CATEGORIZATION_CACHE = {}
+load_dotenv()
 
-def get_meeting_events(start: datetime, end: datetime) -> list[Event]:
-    """Query window events during meeting time"""
+client = ActivityWatchClient("meeting-focus-client", testing=False)
+CATEGORIZATION_CACHE = CategorizationCache(
+    path=os.getenv("CATEGORY_CACHE_PATH", DEFAULT_CACHE_PATH),
+    max_entries=int(os.getenv("CATEGORY_CACHE_MAX_ENTRIES", "50000")),
+    ttl_seconds=float(os.getenv("CATEGORY_CACHE_TTL_SECONDS")) if os.getenv("CATEGORY_CACHE_TTL_SECONDS") else None
+)
+
+REGISTRY.add_collector(cache_collector("categorization_cache", CATEGORIZATION_CACHE))
+
+CATEGORY_RULES = CompiledRuleset.from_file(os.getenv("CATEGORY_RULES_PATH", DEFAULT_RULES_PATH))
+
+LLM_MODEL = 'llama3'
+LLM_CATEGORIES = ['meeting', 'work_related', 'instant_message', 'other']
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "4"))
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))
+
+AW_SLICE = timedelta(minutes=int(os.getenv("AW_SLICE_MINUTES", "60")))
+AW_MIN_SLICE = timedelta(seconds=1)
+AW_PAGE_LIMIT = int(os.getenv("AW_PAGE_LIMIT", "5000"))
+AW_USE_QUERY = os.getenv("AW_USE_QUERY", "1") != "0"
+CATEGORIZE_CHUNK_SIZE = 1000
+# Width of the stored window_events bins; the API derives coarser timelines from them
+ANALYSIS_BIN_MINUTES = int(os.getenv("ANALYSIS_BIN_MINUTES", "1"))
+
+UPSERT_BATCH_SIZE = 500
+_supabase = None
+_supabase_lock = threading.Lock()
+
+def _fetch_slice(slice_start: datetime, slice_end: datetime, first: bool, last: bool, page_limit: int) -> Iterator[Event]:
     events = client.get_events(
         WINDOW_BUCKET,
-        start=start,
-        end=end,
-        limit=10000  
+        start=slice_start,
+        end=slice_end,
+        limit=page_limit
     )
 
-    return sorted(events, key=lambda e: e.timestamp)
+    if len(events) >= page_limit:
+        if slice_end - slice_start > AW_MIN_SLICE:
+            mid = slice_start + (slice_end - slice_start) / 2
+            yield from _fetch_slice(slice_start, mid, first, False, page_limit)
+            yield from _fetch_slice(mid, slice_end, False, last, page_limit)
+            return
+        logger.warning("%d events in %s .. %s, results may be truncated", len(events), slice_start, slice_end)
+
+    # ActivityWatch returns every event overlapping the slice, so an event on a
+    # boundary comes back twice; keep it only in the slice it starts in
+    for ev in sorted(events, key=lambda e: e.timestamp):
+        if (first or ev.timestamp >= slice_start) and (last or ev.timestamp < slice_end):
+            yield ev
+
+def build_window_query() -> str:
+    """ActivityWatch query: merge heartbeats and keep only window time overlapping non-AFK periods"""
+    return "\n".join([
+        f"window = flood(query_bucket({json.dumps(WINDOW_BUCKET)}));",
+        f"afk = flood(query_bucket({json.dumps(AFK_BUCKET)}));",
+        'not_afk = filter_keyvals(afk, "status", ["not-afk"]);',
+        "RETURN = filter_period_intersect(window, not_afk);",
+    ])
+
+def _query_slice(slice_start: datetime, slice_end: datetime, first: bool, last: bool) -> list[Event]:
+    result = client.query(build_window_query(), [(slice_start, slice_end)])
+    events = [Event(**e) for e in result[0]]
+    return [
+        ev for ev in sorted(events, key=lambda e: e.timestamp)
+        if (first or ev.timestamp >= slice_start) and (last or ev.timestamp < slice_end)
+    ]
+
+def get_meeting_events(start: datetime, end: datetime, slice_size: timedelta = AW_SLICE, page_limit: int = AW_PAGE_LIMIT) -> Iterator[Event]:
+    """
+    Stream window events during meeting time in timestamp order.
+
+    The range is fetched one time slice at a time. By default each slice goes
+    through the ActivityWatch query API, which merges heartbeats and drops
+    AFK time on the server; if that fails (or AW_USE_QUERY=0) the slice falls
+    back to raw bucket pages, split in half whenever a page fills up so long
+    ranges are never truncated.
+    """
+    slice_start = start
+    while slice_start < end:
+        slice_end = min(slice_start + slice_size, end)
+        first, last = slice_start == start, slice_end == end
+
+        events = None
+        if AW_USE_QUERY:
+            try:
+                events = _query_slice(slice_start, slice_end, first, last)
+            except Exception as e:
+                logger.warning("ActivityWatch query failed for %s .. %s, falling back to raw events: %s", slice_start, slice_end, e)
+
+        if events is not None:
+            yield from events
+        else:
+            yield from _fetch_slice(slice_start, slice_end, first, last, page_limit)
+        slice_start = slice_end
 
-def categorize_window_event(event: Event) -> str:
-    """Categorize using local Ollama LLM (e.g., llama3 model)"""
-    data = event.data
-    raw_app = data.get("app", "Unknown")
-    raw_title = data.get("title", "Unknown")
-    app = raw_app.lower()
-    title = raw_title.lower()
+def iter_chunks(iterable, size: int):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
 
-    meeting_keywords = ['zoom', 'teams', 'meet', 'webex', 'skype', 'facetime']
-    
-    if any(keyword in app or keyword in title for keyword in meeting_keywords):
-        return 'meeting'
-    
-    browsers = ['chrome', 'firefox', 'safari', 'edge', 'brave', 'opera', 'vivaldi']
-    is_browser = any(browser in app for browser in browsers)
-
-    if is_browser:
-        meeting_url_patterns = [
-            'meet.google.com', 'zoom.us/j/', 'zoom.us/w/', 
-            'teams.microsoft.com', 'webex.com', 'whereby.com',
-            'jitsi.meet', 'bluejeans.com', '8x8.com'
-        ]
-
-        meeting_title_keywords = [
-            'google meet', 'zoom meeting', 'microsoft teams', 
-            'webex meeting', 'video call', 'join meeting',
-            'meeting invitation', 'conference call'
-        ]
-
-        if any(pattern in title or pattern in raw_title.lower() for pattern in meeting_url_patterns) or \
-           any(keyword in title for keyword in meeting_title_keywords):
-            return 'meeting'
-        
-        im_patterns = ['slack.com', 'discord.com', 'telegram.org', 'web.whatsapp.com', 'messenger.com']
-        if any(pattern in title for pattern in im_patterns):
-            return 'instant_message' 
-    
-    dev_tools = ['code', 'vscode', 'intellij', 'pycharm', 'sublime', 'atom', 'terminal']
-    
-    if any(tool in app for tool in dev_tools):
-        return 'work_related'
-    
-    cache_key = (app, title)
-    if cache_key in CATEGORIZATION_CACHE:
-        return CATEGORIZATION_CACHE[cache_key]
-    
-    prompt = f"""
+CATEGORIZATION_GUIDE = """
         You are categorizing the currently active window during work or meeting time.
 
         Categorize it as **exactly one** of these four options:
@@ -100,193 +163,416 @@ def categorize_window_event(event: Event) -> str:
         App: Teams             Title: Microsoft Teams | Daily Standup            → meeting
         App: Google Chrome     Title: UX on Sean - Trello                        → work_related
         App: chrome            Title: YouTube - funny cat video                  → instant_message
+"""
 
+def categorize_by_rules(app: str, title: str) -> str | None:
+    """Heuristic fast path on lowercased app/title; None means the LLM has to decide"""
+    return CATEGORY_RULES.categorize(app, title)
+
+def build_categorization_prompt(app: str, title: str) -> str:
+    return f"""{CATEGORIZATION_GUIDE}
         App name: {app}
         Window title: {title}
 
         Respond **only** with one lowercase word: meeting, browser, work_related, instant_message or other.
         No explanation, no quotes, no extra text.
         """
-    
+
+def build_batch_categorization_prompt(keys: list[tuple[str, str]]) -> str:
+    items = "\n".join(
+        f"        {i}. App name: {app} | Window title: {title}"
+        for i, (app, title) in enumerate(keys, start=1)
+    )
+    return f"""{CATEGORIZATION_GUIDE}
+        Windows to categorize:
+{items}
+
+        Respond with exactly one line per window, in order, formatted as "<number>: <category>"
+        where category is one lowercase word: meeting, browser, work_related, instant_message or other.
+        No explanation, no quotes, no extra text.
+        """
+
+def query_llm_category(app: str, title: str) -> str:
+    """Ask Ollama for one lowercased (app, title) and cache valid answers"""
     try:
-        response = ollama.chat(model='llama3', messages=[{'role': 'user', 'content': prompt}])['message']['content'].strip().lower()
-        if response in ['meeting', 'work_related', 'instant_message', 'other']:
-            CATEGORIZATION_CACHE[cache_key] = response
+        with LLM_REQUEST_SECONDS.time(kind="single"):
+            response = ollama.chat(model=LLM_MODEL, messages=[{'role': 'user', 'content': build_categorization_prompt(app, title)}])['message']['content'].strip().lower()
+        if response in LLM_CATEGORIES:
+            LLM_REQUESTS.inc(kind="single", outcome="ok")
+            CATEGORIZATION_CACHE.set(app, title, response)
             return response
         else:
+            LLM_REQUESTS.inc(kind="single", outcome="invalid")
             return 'other'  
     except Exception as e:
-        print(f"LLM categorization error: {e}")
+        LLM_REQUESTS.inc(kind="single", outcome="error")
+        logger.warning("LLM categorization error: %s", e)
         return 'other'  
 
-def compute_overlap(event_start, event_end, bin_start, bin_end):
-    overlap_start = max(event_start, bin_start)
-    overlap_end = min(event_end, bin_end)
-    return max(0, (overlap_end - overlap_start).total_seconds())
+def categorize_with_llm(app: str, title: str) -> str:
+    """Categorize one lowercased (app, title) via the cache, falling back to Ollama"""
+    cached = CATEGORIZATION_CACHE.get(app, title)
+    if cached is not None:
+        return cached
+    return query_llm_category(app, title)
 
-def save_event_to_supabase(user_id: str, meeting_id: str, event_data: dict):
-    """Save categorized event to Supabase"""
+def categorize_batch_with_llm(keys: list[tuple[str, str]]) -> dict[tuple[str, str], str]:
+    """Categorize several uncached keys with one multi-item prompt; unparsed items fall back to single prompts"""
+    results = {}
     try:
-        load_dotenv()
+        with LLM_REQUEST_SECONDS.time(kind="batch"):
+            content = ollama.chat(model=LLM_MODEL, messages=[{'role': 'user', 'content': build_batch_categorization_prompt(keys)}])['message']['content']
+        LLM_REQUESTS.inc(kind="batch", outcome="ok")
+        for line in content.strip().lower().splitlines():
+            number, sep, category = line.partition(':')
+            number = number.strip().rstrip('.')
+            category = category.strip().strip('\'".')
+            if sep and number.isdigit() and 1 <= int(number) <= len(keys) and category in LLM_CATEGORIES:
+                key = keys[int(number) - 1]
+                results[key] = category
+                CATEGORIZATION_CACHE.set(key[0], key[1], category)
+    except Exception as e:
+        LLM_REQUESTS.inc(kind="batch", outcome="error")
+        logger.warning("LLM batch categorization error: %s", e)
 
-        supabase = create_client(
-            os.getenv("SUPABASE_URL"),      
-            os.getenv("SUPABASE_SERVICE_ROLE_KEY")       
-        )
+    for key in keys:
+        if key not in results:
+            results[key] = query_llm_category(*key)
+    return results
 
-        ts_input = event_data["timestamp"]
+def event_key(event: Event) -> tuple[str, str]:
+    data = event.data
+    return data.get("app", "Unknown").lower(), data.get("title", "Unknown").lower()
 
-        if not ts_input.endswith("Z") and "+" not in ts_input:
-            local_dt = datetime.fromisoformat(ts_input)
-            hkt_tz = timezone(timedelta(hours=8))
-            local_dt = local_dt.replace(tzinfo=hkt_tz)
-            utc_dt = local_dt.astimezone(timezone.utc)
-            ts_to_store = utc_dt.isoformat().replace("+00:00", "Z")
+def categorize_window_event(event: Event) -> str:
+    """Categorize using local Ollama LLM (e.g., llama3 model)"""
+    app, title = event_key(event)
+    return categorize_by_rules(app, title) or categorize_with_llm(app, title)
+
+def categorize_keys(keys, max_workers: int = LLM_MAX_WORKERS, batch_size: int = LLM_BATCH_SIZE) -> dict[tuple[str, str], str]:
+    """
+    Resolve each distinct (app, title) key once: rules first, then the cache,
+    then the LLM for the remaining misses on a bounded thread pool. With
+    batch_size > 1 misses are packed into multi-item prompts.
+    """
+    categories = {}
+    misses = []
+    for key in dict.fromkeys(keys):
+        category = categorize_by_rules(*key) or CATEGORIZATION_CACHE.get(*key)
+        if category is not None:
+            categories[key] = category
         else:
-            ts_to_store = ts_input
-        
-        print(f"Saving: user={user_id[:8]}..., meeting={meeting_id[:8]}..., ts={ts_to_store}, app={event_data['app']}, cat={event_data['category']}")
-
-
-        # supabase.table("window_events").delete().match({
-        #     "user_id": user_id,
-        #     "meeting_id": meeting_id,
-        #     "timestamp": event_data["timestamp"],
-        # }).execute()
-
-        # result = supabase.table("window_events").insert({
-        #     "user_id": user_id,
-        #     "meeting_id": meeting_id,
-        #     "timestamp": event_data["timestamp"],
-        #     "app": event_data["app"],
-        #     "category": event_data["category"],
-        #     "duration_seconds": event_data["duration_seconds"]
-        # }).execute()
-
-        # print(f"Saved: {result}")
-
-        supabase.table("window_events").upsert({
-            "user_id": user_id,
-            "meeting_id": meeting_id, 
-            "timestamp": ts_to_store,  
-            "app": event_data["app"],
-            "category": event_data["category"],
-            "duration_seconds": event_data["duration_seconds"]
-        }, on_conflict="user_id,meeting_id,timestamp").execute()
-
-
-    except Exception as e:
-        print(f"FAILED to save: {e}")
-        raise
-
+            misses.append(key)
+
+    if not misses:
+        return categories
+
+    if batch_size > 1:
+        chunks = [misses[i:i + batch_size] for i in range(0, len(misses), batch_size)]
+        work = categorize_batch_with_llm
+    else:
+        chunks = [[key] for key in misses]
+        work = lambda chunk: {chunk[0]: query_llm_category(*chunk[0])}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        for resolved in pool.map(work, chunks):
+            categories.update(resolved)
+
+    return categories
+
+def categorize_events(events: list[Event], max_workers: int = LLM_MAX_WORKERS, batch_size: int = LLM_BATCH_SIZE) -> list[str]:
+    """Categorize a whole time range, hitting the LLM at most once per distinct (app, title)"""
+    keys = [event_key(ev) for ev in events]
+    categories = categorize_keys(keys, max_workers=max_workers, batch_size=batch_size)
+    return [categories[key] for key in keys]
+
+class EventRecord:
+    """
+    One window event as analysis uses it. Strings are interned, so the many
+    events sharing an app or title hold one copy between them, and the same
+    record is categorized, fed to the focus streaks and used as the binner's
+    dominant payload.
+    """
+
+    __slots__ = ("timestamp", "duration", "app", "title", "category")
+
+    def __init__(self, event: Event):
+        data = event.data
+        self.timestamp = event.timestamp
+        self.duration = event.duration.total_seconds() if event.duration else 10
+        self.app = sys.intern(data.get("app", "Unknown"))
+        self.title = sys.intern(data.get("title", "Untitled"))
+        self.category = None
+
+    @property
+    def end(self) -> datetime:
+        # Microsecond durations survive the round trip through float seconds exactly
+        return self.timestamp + timedelta(seconds=self.duration)
+
+def categorize_records(records: list[EventRecord], keys: list[tuple[str, str]], max_workers: int = LLM_MAX_WORKERS, batch_size: int = LLM_BATCH_SIZE):
+    """categorize_events for records (keys[i] is records[i]'s event_key): sets each record's category in place"""
+    categories = categorize_keys(keys, max_workers=max_workers, batch_size=batch_size)
+    for rec, key in zip(records, keys):
+        rec.category = sys.intern(categories[key])
+
+class EventDetails(Sequence):
+    """Per-event {'cat', 'app', 'title', 'dur_sec'} dicts, built from the records only when read"""
+
+    __slots__ = ("records",)
+
+    def __init__(self, records: list[EventRecord]):
+        self.records = records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._detail(rec) for rec in self.records[index]]
+        return self._detail(self.records[index])
+
+    @staticmethod
+    def _detail(rec: EventRecord) -> dict:
+        return {'cat': rec.category, 'app': rec.app, 'title': rec.title, 'dur_sec': rec.duration}
+
+def get_supabase_client():
+    """Long-lived Supabase client shared by all writes from this process"""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                load_dotenv()
+                _supabase = create_client(
+                    os.getenv("SUPABASE_URL"),      
+                    os.getenv("SUPABASE_SERVICE_ROLE_KEY")       
+                )
+    return _supabase
+
+def to_utc_timestamp(ts_input: str) -> str:
+    """Normalize a bin timestamp for storage; naive inputs are treated as HKT"""
+    if not ts_input.endswith("Z") and "+" not in ts_input:
+        local_dt = datetime.fromisoformat(ts_input)
+        hkt_tz = timezone(timedelta(hours=8))
+        local_dt = local_dt.replace(tzinfo=hkt_tz)
+        utc_dt = local_dt.astimezone(timezone.utc)
+        return utc_dt.isoformat().replace("+00:00", "Z")
+    return ts_input
+
+def save_events_to_supabase(user_id: str, meeting_id: str, events_data: list[dict], batch_size: int = UPSERT_BATCH_SIZE) -> dict:
+    """
+    Save categorized interval rows to Supabase as multi-row upserts.
+
+    Rows are sent in chunks of `batch_size`; a failed chunk is reported and the
+    remaining chunks are still written. Returns rows_written and failed_batches.
+    """
+    supabase = get_supabase_client()
+
+    rows = [{
+        "user_id": user_id,
+        "meeting_id": meeting_id, 
+        "timestamp": to_utc_timestamp(event_data["timestamp"]),  
+        "app": event_data["app"],
+        "category": event_data["category"],
+        "duration_seconds": event_data["duration_seconds"]
+    } for event_data in events_data]
+
+    rows_written = 0
+    failed_batches = []
+
+    for offset in range(0, len(rows), batch_size):
+        batch = rows[offset:offset + batch_size]
+        try:
+            supabase.table("window_events").upsert(
+                batch, on_conflict="user_id,meeting_id,timestamp"
+            ).execute()
+            rows_written += len(batch)
+            ROWS_WRITTEN.inc(len(batch))
+        except Exception as e:
+            FAILED_BATCHES.inc()
+            logger.error(
+                "Failed to save batch %d (%s .. %s, %d rows): %s",
+                offset // batch_size, batch[0]["timestamp"], batch[-1]["timestamp"], len(batch), e
+            )
+            failed_batches.append({
+                "batch": offset // batch_size,
+                "first_timestamp": batch[0]["timestamp"],
+                "last_timestamp": batch[-1]["timestamp"],
+                "rows": len(batch),
+                "error": str(e)
+            })
+
+    logger.info(
+        "Saved %d/%d intervals", rows_written, len(rows),
+        extra={"user_id": user_id, "meeting_id": meeting_id, "failed_batches": len(failed_batches)}
+    )
 
-def analyze_meeting(start_iso: str, end_iso: str, user_id: str, meeting_id: str):
+    return {"rows_written": rows_written, "failed_batches": failed_batches}
+
+
+def load_watermark(user_id: str, meeting_id: str) -> datetime | None:
+    """Start of the last (still open) bin written for this user and meeting, if any"""
+    result = get_supabase_client().table("analysis_watermarks").select("watermark").eq(
+        "user_id", user_id
+    ).eq("meeting_id", meeting_id).execute()
+    if not result.data:
+        return None
+    return datetime.fromisoformat(result.data[0]["watermark"].replace("Z", "+00:00")).astimezone(timezone.utc)
+
+def save_watermark(user_id: str, meeting_id: str, watermark: datetime):
+    get_supabase_client().table("analysis_watermarks").upsert({
+        "user_id": user_id,
+        "meeting_id": meeting_id,
+        "watermark": watermark.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+    }, on_conflict="user_id,meeting_id").execute()
+
+def analyze_meeting(start_iso: str, end_iso: str, user_id: str, meeting_id: str, incremental: bool = False):
+    """
+    Fetch, categorize, bin and save one user's activity for a meeting.
+
+    With incremental=True only the range from the stored watermark (the start
+    of the last bin written, which may still have been open) to end is
+    re-fetched and re-binned, so each live refresh costs the same no matter how
+    far into the meeting it runs. end is capped at the current time, so a live
+    run never writes bins that haven't happened yet. Every run that saves all
+    its rows moves the watermark to its last bin.
+    """
     if user_id == meeting_id:
-        print("WARNING: user_id and meeting_id are the same! BUG")
+        logger.warning("user_id and meeting_id are the same (%s)", user_id)
 
-    CATEGORIZATION_CACHE.clear()
     start = datetime.fromisoformat(start_iso).astimezone(timezone.utc)
     end = datetime.fromisoformat(end_iso).astimezone(timezone.utc)
-    
-    events = get_meeting_events(start, end)
-    if not events:
-        print("No window events found in time range.")
-        return None, None, None, None, None, None
-    
+
+    resume_from = None
+    if incremental:
+        # Callers pass the scheduled end; the last bin written must be the one still open
+        end = min(end, datetime.now(timezone.utc))
+        watermark = load_watermark(user_id, meeting_id)
+        if watermark is not None and watermark > start:
+            start = resume_from = min(watermark, end)
+            logger.info("Incremental analysis from watermark %s", start.isoformat(), extra={"user_id": user_id, "meeting_id": meeting_id})
+
+    timer = StageTimer(ANALYSIS_STAGE_SECONDS)
+    run_started = time.perf_counter()
+
+    def categorized_chunks():
+        for chunk in iter_chunks(timer.iter("aw_fetch", get_meeting_events(start, end)), CATEGORIZE_CHUNK_SIZE):
+            with timer.stage("categorize"):
+                records = [EventRecord(ev) for ev in chunk]
+                categorize_records(records, [event_key(ev) for ev in chunk])
+            yield records
+
+    result = process_meeting_events(categorized_chunks(), start, end, user_id, meeting_id, timer, resume_from=resume_from)
+    timer.observe()
+    ANALYSIS_SECONDS.observe(time.perf_counter() - run_started)
+    return result
+
+def merge_windows(windows: list[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    """Union of (start, end) windows as sorted, non-touching spans"""
+    spans = []
+    for start, end in sorted(windows):
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+def analyze_meetings(user_id: str, meetings: list[dict]) -> dict:
+    """
+    Analyze several meetings for one user from a single ActivityWatch pass.
+
+    `meetings` holds {"meeting_id", "start_time", "end_time"} dicts (UTC ISO).
+    The union of their windows is fetched once and each distinct (app, title)
+    categorized once; every meeting then takes the events overlapping its own
+    window through a bisect over the time-sorted events, and is binned and
+    saved exactly like analyze_meeting would. Returns analyze_meeting's result
+    tuple per meeting_id.
+    """
+    windows = [
+        (
+            m["meeting_id"],
+            datetime.fromisoformat(m["start_time"]).astimezone(timezone.utc),
+            datetime.fromisoformat(m["end_time"]).astimezone(timezone.utc)
+        )
+        for m in meetings
+    ]
+
+    timer = StageTimer(ANALYSIS_STAGE_SECONDS)
+    run_started = time.perf_counter()
+
+    # A long event can overlap two spans that don't touch; keep one copy
+    records = []
+    keys = []
+    seen = set()
+    for span_start, span_end in merge_windows([(start, end) for _, start, end in windows]):
+        for ev in timer.iter("aw_fetch", get_meeting_events(span_start, span_end)):
+            key = event_key(ev)
+            identity = (ev.timestamp, ev.duration, key)
+            if identity not in seen:
+                seen.add(identity)
+                records.append(EventRecord(ev))
+                keys.append(key)
+
+    with timer.stage("categorize"):
+        categorize_records(records, keys)
+    records.sort(key=lambda rec: rec.timestamp)
+
+    # starts is sorted; reach[i] is the latest end among records[:i + 1], so it
+    # is sorted too and everything before bisect(reach, start) ends by start
+    starts = [rec.timestamp for rec in records]
+    ends = [rec.end for rec in records]
+    reach = list(accumulate(ends, max))
+
+    results = {}
+    for meeting_id, start, end in windows:
+        lo = bisect_right(reach, start)
+        hi = bisect_left(starts, end)
+        picked = [i for i in range(lo, hi) if ends[i] > start] if start < end else []
+        logger.info("Batch analysis: %d of %d events in meeting window", len(picked), len(records), extra={"user_id": user_id, "meeting_id": meeting_id})
+        chunk = [records[i] for i in picked]
+        results[meeting_id] = process_meeting_events([chunk] if picked else [], start, end, user_id, meeting_id, timer)
+
+    timer.observe()
+    ANALYSIS_SECONDS.observe(time.perf_counter() - run_started)
+    return results
+
+def process_meeting_events(chunks, start: datetime, end: datetime, user_id: str, meeting_id: str, timer: StageTimer, resume_from: datetime | None = None):
+    """
+    Bin chunks of categorized EventRecords for one meeting window, then save the
+    rows, watermark and rollups. The last element of the result is
+    save_events_to_supabase's rows_written / failed_batches report; the
+    watermark and rollups are only updated when every batch was saved.
+    `resume_from` is the watermark an incremental run started at, which lets
+    the rollup be extended with just this run's rows.
+    """
     total_duration_sec = (end - start).total_seconds()
     category_durations = defaultdict(float)
-    event_details = []  
+    records = []
     focus_durs = []  
     current_focus_start = None
     hkt_tz = timezone(timedelta(hours=8))  
     
-    processed_events = []
-    for ev in events:
-        cat = categorize_window_event(ev)
-        dur_sec = ev.duration.total_seconds() if ev.duration else 10  
-        
-        
-        processed_events.append({
-            'event': ev,
-            'category': cat,
-            'duration_seconds': dur_sec
-        })
-        
-        category_durations[cat] += dur_sec
-        event_details.append({
-            'cat': cat,
-            'app': ev.data.get('app', 'Unknown'),
-            'title': ev.data.get('title', 'Untitled'),
-            'dur_sec': dur_sec
-        })
-        
-        if cat in ['meeting', 'work_related']:
-            if current_focus_start is None:
-                current_focus_start = ev.timestamp
-        else:
-            if current_focus_start is not None:
-                focus_end = ev.timestamp
-                focus_dur = (focus_end - current_focus_start).total_seconds()
-                focus_durs.append(focus_dur)
-                current_focus_start = None
-    
-    if current_focus_start is not None:
-        focus_dur = (end - current_focus_start).total_seconds()
-        focus_durs.append(focus_dur)
-    
-    start_rounded = start.replace(
-        minute=(start.minute // 5) * 5,
-        second=0,
-        microsecond=0
-    )
-    
-    avg_focus_sec = sum(focus_durs) / len(focus_durs) if focus_durs else 0
-    
     interval_data = [] 
-    current_bin = start_rounded
+    interval_rows = []
+    binner = StreamingBinner(start, end, bin_minutes=ANALYSIS_BIN_MINUTES)
+    last_bin_start = [None]
 
-    def is_within_allowed_range(dt: datetime, ranges: list[tuple[int, int]] | None) -> bool:
-        if ranges is None:
-            return True
-        hour = dt.hour
-        for start_h, end_h in ranges:
+    def emit(b):
+        bin_total_sec = b['seconds']
+        bin_category_durations = b['category_durations']
 
-            if start_h <= hour < end_h:
-                return True
-        return False
-    
-    while current_bin < end:
-        bin_end = min(current_bin + timedelta(minutes=5), end)
-        bin_total_sec = (bin_end - current_bin).total_seconds()
-
-        if bin_total_sec <= 0:
-            break
-
-        bin_category_durations = defaultdict(float)
-        dominant_app = "Unknown"
-        dominant_title = "No activity"
-        dominant_cat = "other"
-        max_overlap = 0
-        
-        for item in processed_events:
-            ev = item['event']
-            cat = item['category']
-            
-            ev_start = ev.timestamp
-            ev_end = ev_start + (ev.duration or timedelta(seconds=10))
-            overlap = compute_overlap(ev_start, ev_end, current_bin, bin_end)
-            if overlap > 0:
-                bin_category_durations[cat] += overlap
-                if overlap > max_overlap:
-                    max_overlap = overlap
-                    dominant_app = ev.data.get('app', 'Unknown')
-                    dominant_title = ev.data.get('title', 'Untitled')
-                    dominant_cat = cat
+        if b['dominant'] is not None:
+            dominant = b['dominant']
+            dominant_app, dominant_title, dominant_cat = dominant.app, dominant.title, dominant.category
+        else:
+            dominant_app = "Unknown"
+            dominant_title = "No activity"
+            dominant_cat = "other"
 
         engaged_sec = bin_category_durations.get('meeting', 0) + bin_category_durations.get('work_related', 0)
         engaged_pct = (engaged_sec / bin_total_sec * 100) if bin_total_sec > 0 else 0
 
-        local_bin = current_bin.astimezone(hkt_tz)
+        last_bin_start[0] = b['start']
+        local_bin = b['start'].astimezone(hkt_tz)
         bin_label = local_bin.strftime('%H:%M')
         utc_bin = local_bin.astimezone(timezone.utc)
 
@@ -298,16 +584,67 @@ def analyze_meeting(start_iso: str, end_iso: str, user_id: str, meeting_id: str)
             'engaged_pct': engaged_pct
         })
 
-        save_event_to_supabase(user_id, meeting_id, {
+        interval_rows.append({
             "timestamp": utc_bin.isoformat(),
             "app": dominant_app,
             "category": dominant_cat,
             "duration_seconds": int(bin_total_sec)
         })
 
-        current_bin = bin_end
+    for chunk in chunks:
+        records.extend(chunk)
+        with timer.stage("binning"):
+            for rec in chunk:
+                cat = rec.category
+                category_durations[cat] += rec.duration
+            
+                if cat in ['meeting', 'work_related']:
+                    if current_focus_start is None:
+                        current_focus_start = rec.timestamp
+                else:
+                    if current_focus_start is not None:
+                        focus_end = rec.timestamp
+                        focus_dur = (focus_end - current_focus_start).total_seconds()
+                        focus_durs.append(focus_dur)
+                        current_focus_start = None
+
+                for b in binner.add(rec.timestamp, rec.end, cat, rec):
+                    emit(b)
+
+    ANALYSIS_EVENTS.inc(len(records))
+    if not records:
+        logger.info("No window events found in time range", extra={"user_id": user_id, "meeting_id": meeting_id})
+        return None, None, None, None, None, None, None
+
+    with timer.stage("binning"):
+        for b in binner.finish():
+            emit(b)
+    
+    if current_focus_start is not None:
+        focus_dur = (end - current_focus_start).total_seconds()
+        focus_durs.append(focus_dur)
+    
+    avg_focus_sec = sum(focus_durs) / len(focus_durs) if focus_durs else 0
+
+    with timer.stage("supabase_write"):
+        write = save_events_to_supabase(user_id, meeting_id, interval_rows)
+        if interval_rows and not write["failed_batches"]:
+            save_watermark(user_id, meeting_id, last_bin_start[0])
+    if write["failed_batches"]:
+        # Leave the watermark and rollups alone so a re-run fills the gaps
+        logger.warning(
+            "Skipping watermark and rollups, %d batches failed to save", len(write["failed_batches"]),
+            extra={"user_id": user_id, "meeting_id": meeting_id}
+        )
+    elif interval_rows:
+        with timer.stage("rollups"):
+            try:
+                refresh_rollups(get_supabase_client(), user_id, meeting_id, interval_rows, resume_from)
+            except Exception:
+                # Rollups are derived data; the next analysis run rebuilds them
+                logger.exception("Failed to refresh rollups", extra={"user_id": user_id, "meeting_id": meeting_id})
     
     engaged_duration = category_durations['meeting'] + category_durations['work_related']
     engagement_pct = round(engaged_duration / total_duration_sec * 100, 1) if total_duration_sec > 0 else 0.0
     
-    return total_duration_sec, engagement_pct, dict(category_durations), event_details, avg_focus_sec, interval_data
\ No newline at end of file
+    return total_duration_sec, engagement_pct, dict(category_durations), EventDetails(records), avg_focus_sec, interval_data, write
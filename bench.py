@@ -0,0 +1,250 @@
+"""
+Offline benchmarks for the analysis pipeline.
+
+ActivityWatch, Ollama and Supabase are replaced by in-memory stand-ins with
+injectable latency, and the window events come from a seeded generator, so
+runs are repeatable on any machine without those services.
+
+    python bench.py                          # print a timing table
+    python bench.py --json bench.json        # also save the timings
+    python bench.py --compare bench.json     # exit 1 if a median got slower than --tolerance
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+
+# Keep the benchmark away from real credentials and the shared categorization cache
+os.environ["SUPABASE_URL"] = "http://localhost:54321"
+os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "bench.bench.bench"
+os.environ["CATEGORY_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-"), "categories.sqlite3")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import analyzer  # noqa: E402
+import main  # noqa: E402
+from columnar import EventColumns  # noqa: E402
+from fakes import FakeActivityWatch, FakeSupabase  # noqa: E402
+from timeline import build_interval_data  # noqa: E402
+
+HKT = timezone(timedelta(hours=8))
+
+# (app, title template) pairs; the first few hit the heuristic rules, the
+# unknown apps always go to the LLM
+APPS = [
+    ("zoom.us", "Zoom Meeting {n}"),
+    ("Code", "module_{n}.py — meeting-focus-tracker"),
+    ("Google Chrome", "Design doc {n} - Google Docs"),
+    ("Slack", "general | thread {n}"),
+    ("Notes", "Scratchpad {n}"),
+    ("Preview", "report_{n}.pdf"),
+    ("Spotify", "Playlist {n}"),
+]
+
+
+def generate_events(start: datetime, minutes: int, heartbeat_seconds: float, title_cardinality: int, seed: int = 0) -> list:
+    """Back-to-back window events covering `minutes` from start, merged at roughly `heartbeat_seconds` each"""
+    rng = random.Random(seed)
+    end = start + timedelta(minutes=minutes)
+    events = []
+    ts = start
+    while ts < end:
+        app, template = rng.choice(APPS)
+        duration = timedelta(seconds=heartbeat_seconds * rng.uniform(0.5, 1.5))
+        title = template.format(n=rng.randrange(title_cardinality))
+        events.append(analyzer.Event(timestamp=ts, duration=duration, data={"app": app, "title": title}))
+        ts += duration
+    return events
+
+
+class FakeOllama:
+    """ollama module stand-in answering with a category derived from the prompt"""
+
+    BATCH_ITEM = re.compile(r"^\s*(\d+)\. (App name: .*)$", re.MULTILINE)
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    @staticmethod
+    def _category(text: str) -> str:
+        return analyzer.LLM_CATEGORIES[zlib.crc32(text.encode()) % len(analyzer.LLM_CATEGORIES)]
+
+    def chat(self, model: str, messages: list) -> dict:
+        time.sleep(self.latency)
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        items = self.BATCH_ITEM.findall(prompt)
+        if items:
+            content = "\n".join(f"{n}: {self._category(item)}" for n, item in items)
+        else:
+            content = self._category(prompt.rsplit("App name:", 1)[-1])
+        return {"message": {"content": content}}
+
+
+class FakeRequest:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class FakeResponse:
+    def __init__(self):
+        self.headers = {}
+
+
+def timed(fn, repeat: int, warmup: int, setup=None) -> list:
+    """Wall-clock seconds for `repeat` calls of fn() after `warmup` untimed calls"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def run(args) -> dict:
+    start = datetime(2024, 1, 15, 9, 0, tzinfo=HKT)
+    end = start + timedelta(minutes=args.minutes)
+    meeting_id = str(uuid.UUID(int=args.seed))
+
+    llm = FakeOllama(latency=args.llm_latency_ms / 1000)
+    db = FakeSupabase(latency=args.db_latency_ms / 1000)
+    analyzer.ollama = llm
+    analyzer._supabase = db
+    main.supabase_client = db
+
+    events = generate_events(start, args.minutes, args.heartbeat, args.titles, seed=args.seed)
+    results = {}
+
+    def record(name, samples, **info):
+        results[name] = {
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "max": max(samples),
+            "repeat": len(samples),
+            **info
+        }
+
+    # categorize_window_event, with every distinct (app, title) going to the LLM and then all cached
+    clear_cache = analyzer.CATEGORIZATION_CACHE.clear
+    record("categorize_window_event (cold cache)", timed(
+        lambda: [analyzer.categorize_window_event(ev) for ev in events],
+        args.repeat, args.warmup, setup=clear_cache
+    ), events=len(events))
+    record("categorize_window_event (warm cache)", timed(
+        lambda: [analyzer.categorize_window_event(ev) for ev in events],
+        args.repeat, args.warmup
+    ), events=len(events))
+
+    # analyze_meeting end to end for one user, and once per participant to fill window_events
+    analyzer.client = FakeActivityWatch(events, latency=args.aw_latency_ms / 1000)
+    record("analyze_meeting", timed(
+        lambda: analyzer.analyze_meeting(start.isoformat(), end.isoformat(), "bench-user-0", meeting_id),
+        args.repeat, args.warmup
+    ), events=len(events))
+
+    for u in range(1, args.users):
+        analyzer.client = FakeActivityWatch(
+            generate_events(start, args.minutes, args.heartbeat, args.titles, seed=args.seed + u)
+        )
+        analyzer.analyze_meeting(start.isoformat(), end.isoformat(), f"bench-user-{u}", meeting_id)
+    rows = [row for row in db.tables.get("window_events", []) if row["meeting_id"] == meeting_id]
+
+    cols = EventColumns.from_rows(rows)
+    record("build_interval_data", timed(
+        lambda: build_interval_data(cols, meeting_id),
+        args.repeat, args.warmup
+    ), rows=len(rows))
+
+    def call_endpoint(bin_minutes=5):
+        return asyncio.run(main.analyze_meeting_endpoint(
+            meeting_id, FakeRequest(), FakeResponse(),
+            start.strftime("%Y-%m-%dT%H:%M:%S"), end.strftime("%Y-%m-%dT%H:%M:%S"), bin_minutes
+        ))
+
+    record("analyze_meeting_endpoint (uncached)", timed(
+        call_endpoint, args.repeat, args.warmup, setup=main.analytics_cache.clear
+    ), rows=len(rows), users=args.users)
+    record("analyze_meeting_endpoint (cached)", timed(
+        call_endpoint, args.repeat, args.warmup
+    ), rows=len(rows), users=args.users)
+    # Another resolution of an already-fetched range: only merges the cached pyramid's levels
+    record("analyze_meeting_endpoint (new bin_minutes)", timed(
+        lambda: call_endpoint(60), args.repeat, args.warmup,
+        setup=lambda: main.analytics_cache.invalidate(lambda key: len(key) == 4)
+    ), rows=len(rows), users=args.users)
+
+    # Cross-meeting history, served from the rollups analyze_meeting maintains
+    record("get_user_history", timed(
+        lambda: asyncio.run(main.get_user_history("bench-user-0", None, None, "day")),
+        args.repeat, args.warmup
+    ))
+
+    return results
+
+
+def print_table(results: dict, baseline: dict = None):
+    print(f"{'benchmark':<40} {'min':>10} {'median':>10} {'max':>10}  {'vs baseline':>11}")
+    for name, r in results.items():
+        change = ""
+        if baseline and name in baseline:
+            change = f"{(r['median'] / baseline[name]['median'] - 1) * 100:+.1f}%"
+        print(f"{name:<40} {r['min'] * 1000:>8.2f}ms {r['median'] * 1000:>8.2f}ms {r['max'] * 1000:>8.2f}ms  {change:>11}")
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=60, help="meeting length")
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="average seconds per window event")
+    parser.add_argument("--titles", type=int, default=50, help="distinct titles per app")
+    parser.add_argument("--users", type=int, default=20, help="participants written to window_events")
+    parser.add_argument("--aw-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=5.0)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write timings to PATH")
+    parser.add_argument("--compare", metavar="PATH", help="compare medians against a saved --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed median slowdown vs --compare (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    results = run(args)
+    print_table(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"params": vars(args), "results": results}, f, indent=2)
+
+    if baseline:
+        slower = [
+            name for name, r in results.items()
+            if name in baseline and r["median"] > baseline[name]["median"] * (1 + args.tolerance)
+        ]
+        if slower:
+            print(f"\nREGRESSION (> {args.tolerance:.0%} slower median): {', '.join(slower)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_microseconds(dt: datetime) -> int:
+    """Exact integer microseconds since the epoch (naive datetimes use a naive epoch)"""
+    epoch = EPOCH if dt.tzinfo is not None else EPOCH.replace(tzinfo=None)
+    return (dt - epoch) // ONE_MICROSECOND
+
+
+def floor_to_bin(dt: datetime, bin_minutes: int = 5) -> datetime:
+    """Round a datetime down to the start of its bin within the hour"""
+    return dt.replace(
+        minute=(dt.minute // bin_minutes) * bin_minutes,
+        second=0,
+        microsecond=0
+    )
+
+
+def iter_bin_edges(start: datetime, end: datetime, bin_minutes: int = 5):
+    """Yield (bin_start, bin_end) pairs from the rounded start up to end; the last bin is clipped to end"""
+    current_bin = floor_to_bin(start, bin_minutes)
+    step = timedelta(minutes=bin_minutes)
+
+    while current_bin < end:
+        bin_end = min(current_bin + step, end)
+        if bin_end <= current_bin:
+            break
+        yield current_bin, bin_end
+        current_bin = bin_end
+
+
+class StreamingBinner:
+    """
+    Incremental sweep of intervals over ascending, contiguous bins.
+
+    Intervals must be added in start order. A bin is finalized as soon as an
+    interval starts at or after its end, so only intervals that can still
+    overlap an open bin are kept in memory. Each finalized bin is a dict with
+    its `start`, `end`, `seconds`, per-category overlap `category_durations`
+    and the `dominant` payload (the interval with the largest overlap, or None)
+    with that overlap as `dominant_seconds`. `category_dominant` maps each
+    category to its own (payload, overlap) with the largest overlap.
+    Ties go to the interval that starts first, matching the old per-bin scan
+    over time-ordered events.
+    """
+
+    def __init__(self, start: datetime, end: datetime, bin_minutes: int = 5):
+        self.edges = list(iter_bin_edges(start, end, bin_minutes))
+        self.edges_us = [(to_microseconds(bs), to_microseconds(be)) for bs, be in self.edges]
+        self.next_bin = 0
+        self.active = []
+
+    def add(self, start: datetime, end: datetime, category: str, payload=None) -> list[dict]:
+        """Add one interval; returns the bins it closed"""
+        return self.add_us(to_microseconds(start), to_microseconds(end), category, payload)
+
+    def add_us(self, start_us: int, end_us: int, category: str, payload=None) -> list[dict]:
+        closed = []
+        while self.next_bin < len(self.edges_us) and start_us >= self.edges_us[self.next_bin][1]:
+            closed.append(self._finalize())
+
+        if self.next_bin < len(self.edges_us) and end_us > self.edges_us[self.next_bin][0]:
+            self.active.append((start_us, end_us, category, payload))
+        return closed
+
+    def finish(self) -> list[dict]:
+        """Finalize every remaining bin"""
+        closed = []
+        while self.next_bin < len(self.edges_us):
+            closed.append(self._finalize())
+        return closed
+
+    def _finalize(self) -> dict:
+        bin_start, bin_end = self.edges[self.next_bin]
+        bin_start_us, bin_end_us = self.edges_us[self.next_bin]
+        self.next_bin += 1
+
+        category_durations = defaultdict(float)
+        category_dominant = {}
+        dominant = None
+        max_overlap = 0
+
+        for start_us, end_us, category, payload in self.active:
+            overlap_us = min(end_us, bin_end_us) - max(start_us, bin_start_us)
+            if overlap_us > 0:
+                overlap = overlap_us / 1_000_000
+                category_durations[category] += overlap
+                if overlap > category_dominant.get(category, (None, 0))[1]:
+                    category_dominant[category] = (payload, overlap)
+                if overlap > max_overlap:
+                    max_overlap = overlap
+                    dominant = payload
+
+        self.active = [iv for iv in self.active if iv[1] > bin_end_us]
+
+        return {
+            "start": bin_start,
+            "end": bin_end,
+            "seconds": (bin_end - bin_start).total_seconds(),
+            "category_durations": category_durations,
+            "category_dominant": category_dominant,
+            "dominant": dominant,
+            "dominant_seconds": max_overlap,
+        }
+
+
+def bin_intervals(intervals: list, start: datetime, end: datetime, bin_minutes: int = 5) -> list[dict]:
+    """
+    Bin (start, end, category) datetime intervals into `bin_minutes` bins between start and end.
+
+    Returns the StreamingBinner bin dicts, with `dominant` set to the index of the
+    dominant interval in `intervals` (or None).
+    """
+    binner = StreamingBinner(start, end, bin_minutes)
+    if not binner.edges:
+        return []
+
+    bins = []
+    for i in sorted(range(len(intervals)), key=lambda i: intervals[i][0]):
+        ev_start, ev_end, category = intervals[i]
+        bins.extend(binner.add(ev_start, ev_end, category, i))
+    bins.extend(binner.finish())
+    return bins
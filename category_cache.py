@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".categorization_cache.sqlite3")
+
+
+class CategorizationCache:
+    """
+    On-disk (app, title) -> category cache shared by every worker process.
+
+    Backed by SQLite in WAL mode so uvicorn workers can read and write the same
+    file concurrently. Entries are evicted least-recently-used once the table
+    grows past `max_entries`, and expire after `ttl_seconds` when a TTL is set.
+
+    Hits stay read-only: an entry's last_used is only rewritten once it is more
+    than `touch_interval` seconds old, so LRU order is kept to that resolution.
+    The size check runs every `evict_every` inserts per process, so the table
+    can briefly overshoot max_entries by that many rows per worker.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = 50000,
+        ttl_seconds: Optional[float] = None,
+        touch_interval: float = 60.0,
+        evict_every: int = 100
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.touch_interval = touch_interval
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._inserts = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS categories (
+                app TEXT NOT NULL,
+                title TEXT NOT NULL,
+                category TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (app, title)
+            )
+        """)
+        self._conn().execute("CREATE INDEX IF NOT EXISTS idx_categories_last_used ON categories (last_used)")
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, app: str, title: str) -> Optional[str]:
+        """Return the cached category, or None on a miss or an expired entry"""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT category, created_at, last_used FROM categories WHERE app = ? AND title = ?",
+            (app, title)
+        ).fetchone()
+
+        now = time.time()
+        if row is None or (self.ttl_seconds is not None and now - row[1] > self.ttl_seconds):
+            self._count(hit=False)
+            return None
+
+        if now - row[2] > self.touch_interval:
+            conn.execute(
+                "UPDATE categories SET last_used = ? WHERE app = ? AND title = ?",
+                (now, app, title)
+            )
+        self._count(hit=True)
+        return row[0]
+
+    def set(self, app: str, title: str, category: str):
+        """Store a category; every `evict_every` inserts, evict the least recently used entries beyond max_entries"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO categories (app, title, category, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+            (app, title, category, now, now)
+        )
+        with self._stats_lock:
+            self._inserts += 1
+            if self._inserts < self.evict_every:
+                return
+            self._inserts = 0
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries beyond max_entries"""
+        self._conn().execute(
+            """
+            DELETE FROM categories WHERE rowid IN (
+                SELECT rowid FROM categories ORDER BY last_used ASC
+                LIMIT MAX(0, (SELECT COUNT(*) FROM categories) - ?)
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM categories")
+
+    def stats(self) -> dict:
+        entries = self._conn().execute("SELECT COUNT(*) FROM categories").fetchone()[0]
+        with self._stats_lock:
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds
+            }
@@ -0,0 +1,109 @@
+import json
+import os
+import re
+from collections import defaultdict
+from typing import Optional
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "categorization_rules.json")
+
+FIELDS = ("app", "title")
+SEPARATOR = "\x00"
+
+
+def trie_regex(patterns) -> str:
+    """Prefix-factored alternation; optional tails are greedy so the longest pattern wins"""
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return body + "?" if len(branches) == 1 and len(body) == 1 else "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class CompiledRuleset:
+    """
+    Ordered substring rules compiled into one regex scanned once per event.
+
+    Each rule maps any of its `app`/`title` substrings to a category and may
+    require an app group (e.g. "browser") to match as well; the first rule that
+    fires wins. App and title are scanned together as "app\\0title" with a single
+    prefix-factored lookahead regex that reports the longest pattern at each position.
+    Every pattern carries the tags of all shorter patterns that are its
+    prefixes, so that one match accounts for every pattern starting there.
+    """
+
+    def __init__(self, config: dict):
+        self.rules = []
+        tags = {field: defaultdict(set) for field in FIELDS}
+
+        for group, patterns in config.get("app_groups", {}).items():
+            for pattern in patterns:
+                if pattern:
+                    tags["app"][pattern.lower()].add(f"group:{group}")
+
+        for i, rule in enumerate(config.get("rules", [])):
+            requires = rule.get("requires")
+            if requires is not None and requires not in config.get("app_groups", {}):
+                raise ValueError(f"Rule {i} requires unknown app group '{requires}'")
+            self.rules.append((f"rule:{i}", f"group:{requires}" if requires else None, rule["category"]))
+            for field in FIELDS:
+                for pattern in rule.get(field, []):
+                    if pattern:
+                        tags[field][pattern.lower()].add(f"rule:{i}")
+
+        patterns = sorted({p for field in FIELDS for p in tags[field]})
+
+        self.lookup = {}
+        for field in FIELDS:
+            for pattern in patterns:
+                closed = set()
+                for prefix, prefix_tags in tags[field].items():
+                    if pattern.startswith(prefix):
+                        closed |= prefix_tags
+                if closed:
+                    self.lookup[(field, pattern)] = frozenset(closed)
+
+        self.regex = re.compile(f"(?=({trie_regex(patterns)}))") if patterns else None
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES_PATH) -> "CompiledRuleset":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def categorize(self, app: str, title: str) -> Optional[str]:
+        """Category for a lowercased (app, title), or None when no rule fires"""
+        if self.regex is None:
+            return None
+
+        split = len(app)
+        hits = set()
+        lookup = self.lookup
+        first_tag, first_required, first_category = self.rules[0] if self.rules else (None, None, None)
+        for m in self.regex.finditer(f"{app}{SEPARATOR}{title}"):
+            field = "app" if m.start() < split else "title"
+            hit = lookup.get((field, m.group(1)))
+            if hit:
+                hits |= hit
+                # Nothing can outrank the first rule, so stop scanning once it fires
+                if first_tag in hits and (first_required is None or first_required in hits):
+                    return first_category
+
+        if not hits:
+            return None
+
+        for rule_tag, required_group, category in self.rules:
+            if rule_tag in hits and (required_group is None or required_group in hits):
+                return category
+        return None
@@ -0,0 +1,92 @@
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from binning import EPOCH, ONE_MICROSECOND, to_microseconds
+
+
+class Interner:
+    """Maps repeated strings to small integer codes (assigned in first-seen order)"""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def parse_timestamp(ts_str: str) -> datetime:
+    if ts_str.endswith("Z"):
+        ts_str = ts_str[:-1] + "+00:00"
+    return datetime.fromisoformat(ts_str)
+
+
+class EventColumns:
+    """
+    Column-oriented, time-sorted copy of window_events rows.
+
+    Timestamps are parsed exactly once into integer microseconds since the
+    epoch (`start_us`/`end_us`), and user, category, app and title are stored as
+    codes into per-column interners, so aggregation never touches row dicts or
+    ISO strings again.
+    """
+
+    __slots__ = ("start_us", "end_us", "duration", "user", "category", "app", "title",
+                 "users", "categories", "apps", "titles")
+
+    def __init__(self):
+        self.start_us = array("q")
+        self.end_us = array("q")
+        self.duration = array("q")
+        self.user = array("i")
+        self.category = array("i")
+        self.app = array("i")
+        self.title = array("i")
+        self.users = Interner()
+        self.categories = Interner()
+        self.apps = Interner()
+        self.titles = Interner()
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> "EventColumns":
+        cols = cls()
+        cols._append_parsed(sorted(
+            ((to_microseconds(parse_timestamp(r["timestamp"])), r) for r in rows),
+            key=lambda x: x[0]
+        ))
+        return cols
+
+    def extend(self, rows: List[Dict]):
+        """Append rows that are already in timestamp order and no earlier than the last row (e.g. query pages)"""
+        self._append_parsed([(to_microseconds(parse_timestamp(r["timestamp"])), r) for r in rows])
+
+    def _append_parsed(self, parsed: List[tuple]):
+        durations = [r["duration_seconds"] for _, r in parsed]
+        if self.duration.typecode == "q" and not all(float(d).is_integer() for d in durations):
+            self.duration = array("d", self.duration)
+
+        for (start_us, r), dur in zip(parsed, durations):
+            title = r.get("title", "—")
+            self.start_us.append(start_us)
+            self.end_us.append(start_us + timedelta(seconds=dur) // ONE_MICROSECOND)
+            self.duration.append(dur if self.duration.typecode == "d" else int(dur))
+            self.user.append(self.users.code(r["user_id"]))
+            self.category.append(self.categories.code(r["category"]))
+            self.app.append(self.apps.code(r.get("app", "Unknown")))
+            self.title.append(self.titles.code("—" if title is None else title))
+
+    def __len__(self) -> int:
+        return len(self.start_us)
+
+    def timestamp(self, i: int) -> datetime:
+        return EPOCH + timedelta(microseconds=self.start_us[i])
+
+    def category_code(self, name: str) -> Optional[int]:
+        return self.categories.codes.get(name)
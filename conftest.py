@@ -0,0 +1,9 @@
+import pytest
+
+from fakes import FakeSupabase
+
+
+@pytest.fixture
+def supabase():
+    """An empty in-memory Supabase client (see fakes.py)"""
+    return FakeSupabase()
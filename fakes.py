@@ -0,0 +1,223 @@
+"""
+In-memory stand-ins for ActivityWatch and Supabase, shared by bench.py and the tests.
+"""
+import time
+import uuid
+from datetime import datetime, timezone
+
+from columnar import parse_timestamp
+
+
+class FakeActivityWatch:
+    """ActivityWatchClient stand-in serving a fixed event list"""
+
+    def __init__(self, events: list, latency: float = 0.0):
+        self.events = events
+        self.latency = latency
+
+    def _overlapping(self, start: datetime, end: datetime) -> list:
+        return [ev for ev in self.events if ev.timestamp < end and ev.timestamp + ev.duration > start]
+
+    def get_events(self, bucket_id: str, start: datetime = None, end: datetime = None, limit: int = -1) -> list:
+        time.sleep(self.latency)
+        events = sorted(self._overlapping(start, end), key=lambda ev: ev.timestamp, reverse=True)
+        return events if limit < 0 else events[:limit]
+
+    def query(self, query: str, timeperiods: list) -> list:
+        time.sleep(self.latency)
+        return [
+            [{"timestamp": ev.timestamp, "duration": ev.duration, "data": ev.data} for ev in self._overlapping(start, end)]
+            for start, end in timeperiods
+        ]
+
+
+class FakeResult:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Just enough of the postgrest query builder for the code paths benchmarked and tested here"""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table_name = table
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+        self.write = None
+        self.is_single = False
+        self.is_delete = False
+        self.count = None
+
+    def select(self, *columns, count=None):
+        self.count = count
+        return self
+
+    def _filter(self, column, op, value):
+        self.filters.append(lambda row: _compare(row.get(column), op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, expression: str):
+        self.filters.append(_parse_or(expression))
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    def insert(self, rows):
+        self.write = ("insert", rows if isinstance(rows, list) else [rows], None)
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.write = ("upsert", rows if isinstance(rows, list) else [rows], on_conflict)
+        return self
+
+    def delete(self):
+        self.is_delete = True
+        return self
+
+    def execute(self) -> FakeResult:
+        time.sleep(self.db.latency)
+        self.db.calls += 1
+        if self.write:
+            return FakeResult(self.db.write(self.table_name, *self.write))
+
+        rows = [row for row in self.db.tables.get(self.table_name, []) if all(f(row) for f in self.filters)]
+        if self.is_delete:
+            return FakeResult(self.db.delete(self.table_name, rows))
+        self.db.reads[self.table_name] = self.db.reads.get(self.table_name, 0) + 1
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+        count = len(rows)
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+        if self.db.max_rows is not None:
+            rows = rows[:self.db.max_rows]
+        if self.is_single:
+            return FakeResult(rows[0] if rows else None, count)
+        return FakeResult(rows, count)
+
+
+def _sort_key(value):
+    if isinstance(value, str):
+        try:
+            return (0, parse_timestamp(value).astimezone(timezone.utc).timestamp(), "")
+        except ValueError:
+            pass
+    return (1, 0, value)
+
+
+def _compare(left, op: str, right) -> bool:
+    if left is None:
+        return False
+    left, right = _sort_key(left), _sort_key(str(right) if not isinstance(right, (int, float)) else right)
+    return {
+        "eq": left == right, "gt": left > right, "gte": left >= right,
+        "lt": left < right, "lte": left <= right
+    }[op]
+
+
+def _split_top_level(expression: str) -> list:
+    parts, depth, current = [], 0, ""
+    for ch in expression:
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    return parts + [current]
+
+
+def _parse_or(expression: str, combine=any):
+    """Filter from a PostgREST or=(...) expression of column.op.value terms and nested and(...)"""
+    terms = []
+    for part in _split_top_level(expression):
+        if part.startswith("and(") and part.endswith(")"):
+            terms.append(_parse_or(part[4:-1], combine=all))
+        else:
+            column, op, value = part.split(".", 2)
+            terms.append(lambda row, c=column, o=op, v=value: _compare(row.get(c), o, v))
+    return lambda row: combine(term(row) for term in terms)
+
+
+class FakeSupabase:
+    """
+    In-memory Supabase client stand-in with a fixed delay per request.
+    `reads` counts selects per table; `max_rows` caps every response like PostgREST's max-rows.
+    """
+
+    def __init__(self, latency: float = 0.0, max_rows: int = None, **tables):
+        self.latency = latency
+        self.max_rows = max_rows
+        self.calls = 0
+        self.reads = {}
+        self.tables = {name: list(rows) for name, rows in tables.items()}
+        self._indexes = {}
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def write(self, table: str, mode: str, rows: list, on_conflict) -> list:
+        stored = self.tables.setdefault(table, [])
+        columns = tuple(on_conflict.split(",")) if on_conflict else None
+        index = None
+        if columns:
+            # Rows a test put in the table directly still conflict with upserts
+            if (table, columns) not in self._indexes:
+                self._indexes[(table, columns)] = {tuple(row.get(c) for c in columns): row for row in stored}
+            index = self._indexes[(table, columns)]
+        written = []
+        for row in rows:
+            key = tuple(row[c] for c in columns) if columns else None
+            if mode == "upsert" and index is not None and key in index:
+                index[key].update(row)
+                written.append(index[key])
+                continue
+            row = {"id": str(uuid.uuid4()), **row}
+            stored.append(row)
+            if index is not None:
+                index[key] = row
+            written.append(row)
+        return written
+
+    def delete(self, table: str, rows: list) -> list:
+        doomed = {id(row) for row in rows}
+        self.tables[table] = [row for row in self.tables.get(table, []) if id(row) not in doomed]
+        for (name, _), index in self._indexes.items():
+            if name == table:
+                for key in [k for k, row in index.items() if id(row) in doomed]:
+                    del index[key]
+        return rows
@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+FINISHED_STATUSES = ("completed", "partial", "failed")
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds max_queued pending jobs"""
+
+
+class JobQueue:
+    """
+    In-process background job queue with a fixed pool of worker threads.
+
+    Jobs are plain callables; their return value becomes the job result, and a
+    result dict whose "status" is "partial" or "failed" gives the job that
+    status (a raised exception fails it with the error). At most
+    `max_queued` jobs may wait at once so load spikes are rejected early instead
+    of piling up, and only the latest `max_finished` finished jobs are kept.
+    """
+
+    def __init__(self, workers: int = 2, max_queued: int = 20, max_finished: int = 500):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, fn: Callable[..., Any], *args, kind: str = "job", **kwargs) -> dict:
+        """Queue fn(*args, **kwargs) and return a snapshot of the new job"""
+        self._ensure_workers()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "queue_seconds": None,
+            "run_seconds": None,
+            "result": None,
+            "error": None
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            try:
+                self._queue.put_nowait((job_id, fn, args, kwargs))
+            except queue.Full:
+                del self._jobs[job_id]
+                raise JobQueueFull(f"{self.max_queued} jobs already queued")
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": self.workers, "max_queued": self.max_queued, "queued": self._queue.qsize(), "jobs": counts}
+
+    def _worker(self):
+        while True:
+            job_id, fn, args, kwargs = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job["status"] = "running"
+                job["started_at"] = time.time()
+                job["queue_seconds"] = job["started_at"] - job["submitted_at"]
+
+            try:
+                result = fn(*args, **kwargs)
+                status, error = "completed", None
+                if isinstance(result, dict) and result.get("status") in ("partial", "failed"):
+                    status, error = result["status"], result.get("message")
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job_id, job["kind"])
+                result, status, error = None, "failed", str(e)
+
+            with self._lock:
+                job["status"] = status
+                job["result"] = result
+                job["error"] = error
+                job["finished_at"] = time.time()
+                job["run_seconds"] = job["finished_at"] - job["started_at"]
+                self._trim()
+
+            self._queue.task_done()
+
+    def _trim(self):
+        finished = [jid for jid, job in self._jobs.items() if job["status"] in FINISHED_STATUSES]
+        for jid in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[jid]
@@ -0,0 +1,153 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, any `extra=` fields and exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain one-line format for local development, with `extra=` fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = " ".join(
+            f"{key}={value}" for key, value in record.__dict__.items()
+            if key not in _RECORD_FIELDS and not key.startswith("_")
+        )
+        if extras:
+            first, sep, rest = line.partition("\n")
+            line = f"{first} {extras}{sep}{rest}"
+        return line
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """
+    Samples and rate-limits DEBUG records per call site.
+
+    A `sample_rate` fraction of DEBUG records is kept, then at most `per_second`
+    of those per (logger, line) pass; the next record that gets through carries
+    `suppressed=<n>` so dropped output is still visible. INFO and above always pass.
+    """
+
+    def __init__(self, per_second: float = 5.0, sample_rate: float = 1.0):
+        super().__init__()
+        self.per_second = per_second
+        self.sample_rate = sample_rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+
+        key = (record.name, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(key, (self.per_second, now, 0))
+            tokens = min(self.per_second, tokens + (now - last) * self.per_second)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge args now; formatting (and any traceback) happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(spec: str) -> dict:
+    """'analyzer=DEBUG,main=WARNING' -> {'analyzer': 'DEBUG', 'main': 'WARNING'}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """
+    Route all logging through a bounded queue drained by one background thread.
+
+    Configured from the environment: LOG_LEVEL (root level, default INFO),
+    LOG_LEVELS (per-logger overrides), LOG_FORMAT (json or text),
+    LOG_QUEUE_SIZE, LOG_DEBUG_RATE and LOG_DEBUG_SAMPLE. Safe to call twice.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter() if os.getenv("LOG_FORMAT", "json") == "json" else TextFormatter())
+
+        log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(DebugRateLimitFilter(
+            per_second=float(os.getenv("LOG_DEBUG_RATE", "5")),
+            sample_rate=float(os.getenv("LOG_DEBUG_SAMPLE", "1.0"))
+        ))
+
+        root = logging.getLogger()
+        root.handlers[:] = [handler]
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        for name, level in parse_levels(os.getenv("LOG_LEVELS", "")).items():
+            logging.getLogger(name).setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -1,8 +1,18 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 import json
+import logging
+import hashlib
+import time
+import base64
+import uuid
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.middleware.cors import CORSMiddleware 
 import os
 from supabase import create_client, Client
@@ -10,9 +20,20 @@ from dotenv import load_dotenv
 from collections import defaultdict
 import re
 
-from analyzer import analyze_meeting  
+from analyzer import analyze_meeting, analyze_meetings
+from aggregation import aggregate_meeting_rows
+from columnar import EventColumns
+from timeline import TIMELINE_LEVELS, TimelinePyramid
+from jobs import JobQueue, JobQueueFull
+from result_cache import ResultCache
+from logging_config import configure_logging
+from metrics import ANALYTICS_STAGE_SECONDS, HTTP_REQUEST_SECONDS, REGISTRY, StageTimer, cache_collector
+from rollups import combine_rollups, summarize
+from window_events import WINDOW_EVENT_COLUMNS, fetch_window_event_pages, to_filter_timestamp
 
 load_dotenv()
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Meeting Focus Tracker API")
 
@@ -21,6 +42,89 @@ supabase_client: Client = create_client(
     os.getenv("SUPABASE_SERVICE_ROLE_KEY")   
 )
 
+# Dedicated, bounded pool for the synchronous Supabase client so slow queries
+# never block the event loop (and can't starve FastAPI's default threadpool)
+db_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_POOL_SIZE", "8")),
+    thread_name_prefix="supabase"
+)
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking data-access call on the Supabase pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(fn, *args, **kwargs))
+
+# Separate pool for CPU-bound analytics (row parsing, aggregation, timeline
+# binning, ETag hashing) so a big meeting neither stalls the event loop nor
+# ties up the Supabase threads
+analytics_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ANALYTICS_POOL_SIZE", "2")),
+    thread_name_prefix="analytics"
+)
+
+async def run_analytics(fn, *args, **kwargs):
+    """Run a CPU-bound analytics step on the analytics pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(analytics_executor, functools.partial(fn, *args, **kwargs))
+
+# Keyset page size for window_events reads (PostgREST max-rows caps it anyway) and
+# how many time spans of a meeting are fetched at once
+WINDOW_EVENTS_PAGE_SIZE = int(os.getenv("WINDOW_EVENTS_PAGE_SIZE", "1000"))
+WINDOW_EVENTS_FETCH_CONCURRENCY = int(os.getenv("WINDOW_EVENTS_FETCH_CONCURRENCY", "4"))
+
+analytics_cache = ResultCache(
+    max_entries=int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "256")),
+    ttl_seconds=float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+)
+analytics_generation = defaultdict(int)
+
+# Public listing pages are identical for every caller; cleared on create/join
+public_meetings_cache = ResultCache(
+    max_entries=64,
+    ttl_seconds=float(os.getenv("PUBLIC_MEETINGS_CACHE_TTL_SECONDS", "10"))
+)
+
+analysis_jobs = JobQueue(
+    workers=int(os.getenv("ANALYSIS_WORKERS", "2")),
+    max_queued=int(os.getenv("ANALYSIS_MAX_QUEUED", "20"))
+)
+
+def job_queue_metrics():
+    stats = analysis_jobs.stats()
+    return [
+        ("analysis_jobs_queued", "gauge", "trigger-analysis jobs waiting for a worker", [({}, stats["queued"])]),
+        ("analysis_jobs", "gauge", "Tracked trigger-analysis jobs by status",
+         [({"status": status}, count) for status, count in sorted(stats["jobs"].items())]),
+    ]
+
+REGISTRY.add_collector(cache_collector("analytics_cache", analytics_cache))
+REGISTRY.add_collector(cache_collector("public_meetings_cache", public_meetings_cache))
+REGISTRY.add_collector(job_queue_metrics)
+
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(row: dict, key: str) -> str:
+    """Opaque keyset cursor pointing just past `row` in (key, id) order"""
+    return base64.urlsafe_b64encode(json.dumps([row[key], row["id"]]).encode()).decode()
+
+def apply_cursor(query, key: str, cursor: Optional[str]):
+    """Restrict a (key desc, id desc) query to rows after `cursor`"""
+    if not cursor:
+        return query
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = to_filter_timestamp(value)
+        row_id = str(uuid.UUID(str(row_id)))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return query.or_(f"{key}.lt.{value},and({key}.eq.{value},id.lt.{row_id})")
+
+def paginate(rows: List[dict], limit: int, key: str, response: Response) -> List[dict]:
+    """Trim a limit + 1 fetch to one page and advertise the next cursor if there is more"""
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[limit - 1], key)
+    return rows[:limit]
+
 class UserRegisterRequest(BaseModel):
     user_id: str  
 
@@ -55,14 +159,31 @@ class MeetingAnalyticsResponse(BaseModel):
     engagement_percentage: float
     category_durations: Dict[str, float]
     avg_focus_seconds: float
+    bin_minutes: int = 5
     interval_data: List[Dict[str, Any]]
     user_interval_data: Dict[str, List[Dict[str, Any]]]
     user_stats: List[Dict[str, Any]]
+    cohort_heatmap: Dict[str, Any] = {}
+
+class BatchMeetingWindow(BaseModel):
+    meeting_id: str
+    start_time: str
+    end_time: str
+
+class BatchAnalysisRequest(BaseModel):
+    meetings: List[BatchMeetingWindow]
+
+class HistoryResponse(BaseModel):
+    user_id: str
+    granularity: str
+    summary: Dict[str, Any]
+    series: List[Dict[str, Any]]
 
 class TriggerAnalysisRequest(BaseModel):
     user_id: str
     start_time: str  
     end_time: str
+    incremental: bool = False
 
 class PublicMeetingResponse(BaseModel):
     id: str
@@ -78,16 +199,129 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw path, to keep series bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - t0,
+            method=request.method,
+            path=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics for this worker process"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.middleware("http")
 async def debug_cors(request, call_next):
     origin = request.headers.get("origin")
     if origin:
-        print(f"🔍 CORS request from: '{origin}'")
+        logger.debug("CORS request", extra={"origin": origin, "path": request.url.path})
     response = await call_next(request)
     return response
 
+def hkt_to_utc(ts: str) -> str:
+    """Naive HKT request time (a trailing Z is ignored) -> UTC ISO string"""
+    hkt_tz = timezone(timedelta(hours=8))
+    local = datetime.fromisoformat(ts.replace("Z", ""))
+    return local.replace(tzinfo=hkt_tz).astimezone(timezone.utc).isoformat()
+
+def run_trigger_analysis(meeting_id: str, user_id: str, start_utc: str, end_utc: str, incremental: bool = False) -> dict:
+    """Background job body: fetch ActivityWatch data → categorize → save to Supabase"""
+    result = analyze_meeting(
+        start_iso=start_utc,
+        end_iso=end_utc,
+        user_id=user_id,      
+        meeting_id=meeting_id,
+        incremental=incremental
+    )
+    return analysis_job_result(meeting_id, user_id, result, incremental)
+
+def run_batch_analysis(user_id: str, meetings: List[Dict[str, str]]) -> dict:
+    """Background job body for a user's batch: one ActivityWatch pass shared by every meeting"""
+    results = analyze_meetings(user_id, meetings)
+    per_meeting = {
+        meeting_id: analysis_job_result(meeting_id, user_id, result)
+        for meeting_id, result in results.items()
+    }
+    statuses = {r["status"] for r in per_meeting.values()}
+    if statuses <= {"completed"}:
+        status, message = "completed", f"Analyzed {len(results)} meetings"
+    else:
+        failed = sum(r["status"] != "completed" for r in per_meeting.values())
+        status = "failed" if statuses == {"failed"} else "partial"
+        message = f"Analyzed {len(results)} meetings, {failed} not fully saved"
+    return {"status": status, "message": message, "meetings": per_meeting}
+
+def analysis_job_result(meeting_id: str, user_id: str, result: tuple, incremental: bool = False) -> dict:
+    """
+    Job result for one analyzed meeting; drops that meeting's cached analytics.
+    Status is "partial" when some interval batches failed to save and "failed"
+    when none were saved.
+    """
+    if result[0] is None:
+        logger.info("No ActivityWatch events found for this time range", extra={"meeting_id": meeting_id, "user_id": user_id})
+        return {
+            "status": "completed",
+            "message": "No activity data found in ActivityWatch for this time range",
+            "events_processed": 0
+        }
+    
+    total_sec, engagement, cat_durations, event_details, avg_focus, interval_data, write = result
+    failed_batches = write["failed_batches"]
+    
+    dropped = 0
+    if write["rows_written"]:
+        analytics_generation[meeting_id] += 1
+        dropped = analytics_cache.invalidate(lambda key: key[0] == meeting_id)
+    
+    if not failed_batches:
+        status, message = "completed", "Analysis completed successfully"
+    elif write["rows_written"]:
+        status, message = "partial", f"Saved {write['rows_written']} of {len(interval_data)} intervals, {len(failed_batches)} batches failed"
+    else:
+        status, message = "failed", f"Failed to save any of {len(interval_data)} intervals"
+    
+    level = logging.INFO if status == "completed" else logging.ERROR
+    logger.log(level, "Analysis %s", status, extra={
+        "meeting_id": meeting_id,
+        "user_id": user_id,
+        "total_duration_min": round(total_sec / 60, 1),
+        "engagement_pct": engagement,
+        "intervals_saved": write["rows_written"],
+        "failed_batches": len(failed_batches),
+        "category_durations": cat_durations,
+        "cache_entries_invalidated": dropped
+    })
+    
+    return {
+        "status": status,
+        "message": message,
+        "events_processed": len(interval_data),
+        "rows_written": write["rows_written"],
+        "failed_batches": failed_batches,
+        "incremental": incremental,
+        "summary": {
+            "total_duration_sec": total_sec,
+            "engagement_percentage": engagement,
+            "category_durations": cat_durations,
+            "avg_focus_seconds": avg_focus
+        }
+    }
+
 @app.post("/meetings/{meeting_id}/trigger-analysis", status_code=202)
 async def trigger_analysis_endpoint(
     meeting_id: str,
@@ -95,96 +329,152 @@ async def trigger_analysis_endpoint(
 ):
     """
     Trigger fresh analysis: fetch ActivityWatch data → categorize → save to Supabase
-    Returns immediately; analysis runs synchronously (consider Celery for async in production)
+    Returns immediately with a job id; poll GET /jobs/{job_id} for the result
     """
     try:
-        print(f"\n🚀 Triggering analysis:")
-        print(f"  meeting_id: {meeting_id}")
-        print(f"  user_id: {req.user_id}")
-        print(f"  time range: {req.start_time} to {req.end_time}")
+        logger.info("Triggering analysis", extra={
+            "meeting_id": meeting_id,
+            "user_id": req.user_id,
+            "start_time": req.start_time,
+            "end_time": req.end_time,
+            "incremental": req.incremental
+        })
         
-        meeting = supabase_client.table("meetings").select("id").eq("id", meeting_id).execute()
-        if not meeting:
+        meeting = await run_db(supabase_client.table("meetings").select("id").eq("id", meeting_id).execute)
+        if not meeting.data:
             raise HTTPException(status_code=404, detail=f"Meeting {meeting_id} not found")
         
-        user = supabase_client.table("users").select("id").eq("id", req.user_id).execute()
-        if not user:
-            supabase_client.table("users").insert({"id": req.user_id}).execute()
-            print(f"Auto-registered user {req.user_id}")
+        user = await run_db(supabase_client.table("users").select("id").eq("id", req.user_id).execute)
+        if not user.data:
+            await run_db(supabase_client.table("users").insert({"id": req.user_id}).execute)
+            logger.info("Auto-registered user %s", req.user_id)
         
-        from datetime import datetime, timezone, timedelta
+        start_utc = hkt_to_utc(req.start_time)
+        end_utc = hkt_to_utc(req.end_time)
         
-        hkt_tz = timezone(timedelta(hours=8))
-        start_local = datetime.fromisoformat(req.start_time.replace("Z", ""))
-        end_local = datetime.fromisoformat(req.end_time.replace("Z", ""))
-        
-        start_utc = start_local.replace(tzinfo=hkt_tz).astimezone(timezone.utc).isoformat()
-        end_utc = end_local.replace(tzinfo=hkt_tz).astimezone(timezone.utc).isoformat()
-        
-        print(f"  Converted to UTC: {start_utc} to {end_utc}")
-        
-        from analyzer import analyze_meeting
-        
-        result = analyze_meeting(
-            start_iso=start_utc,
-            end_iso=end_utc,
-            user_id=req.user_id,      
-            meeting_id=meeting_id     
-        )
+        logger.debug("Converted to UTC: %s to %s", start_utc, end_utc)
         
-        if result[0] is None:
-            print(f"No ActivityWatch events found for this time range")
-            return {
-                "status": "completed",
-                "message": "No activity data found in ActivityWatch for this time range",
-                "events_processed": 0
-            }
-        
-        total_sec, engagement, cat_durations, event_details, avg_focus, interval_data = result
+        try:
+            job = analysis_jobs.submit(
+                run_trigger_analysis, meeting_id, req.user_id, start_utc, end_utc, req.incremental,
+                kind="trigger-analysis"
+            )
+        except JobQueueFull as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Analysis queue is full ({e}), try again shortly",
+                headers={"Retry-After": "30"}
+            )
         
-        print(f"    Analysis complete:")
-        print(f"    - Total duration: {total_sec/60:.1f} min")
-        print(f"    - Engagement: {engagement}%")
-        print(f"    - Events saved: {len(interval_data)} intervals")
-        print(f"    - Categories: {cat_durations}")
+        logger.info("Queued job %s", job["id"], extra={"meeting_id": meeting_id, "user_id": req.user_id})
         
         return {
-            "status": "completed",
-            "message": "Analysis completed successfully",
-            "events_processed": len(interval_data),
-            "summary": {
-                "total_duration_sec": total_sec,
-                "engagement_percentage": engagement,
-                "category_durations": cat_durations,
-                "avg_focus_seconds": avg_focus
-            }
+            "status": "queued",
+            "message": "Analysis queued",
+            "job_id": job["id"],
+            "status_url": f"/jobs/{job['id']}"
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f"Trigger analysis error: {e}")
-        traceback.print_exc()
+        logger.exception("Trigger analysis error: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@app.post("/users/{user_id}/trigger-analysis", status_code=202)
+async def trigger_batch_analysis_endpoint(
+    user_id: str,
+    req: BatchAnalysisRequest
+):
+    """
+    Trigger analysis of several meetings for one user as a single job.
+    ActivityWatch is read once for the union of the windows and each distinct
+    title categorized once; poll GET /jobs/{job_id} for per-meeting results.
+    """
+    meeting_ids = [m.meeting_id for m in req.meetings]
+    if not meeting_ids:
+        raise HTTPException(status_code=400, detail="meetings must not be empty")
+    if len(set(meeting_ids)) != len(meeting_ids):
+        raise HTTPException(status_code=400, detail="Each meeting may appear only once")
+
+    try:
+        found = await run_db(supabase_client.table("meetings").select("id").in_("id", meeting_ids).execute)
+        missing = set(meeting_ids) - {row["id"] for row in found.data or []}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Meetings not found: {', '.join(sorted(missing))}")
+
+        user = await run_db(supabase_client.table("users").select("id").eq("id", user_id).execute)
+        if not user.data:
+            await run_db(supabase_client.table("users").insert({"id": user_id}).execute)
+            logger.info("Auto-registered user %s", user_id)
+
+        try:
+            windows = [
+                {"meeting_id": m.meeting_id, "start_time": hkt_to_utc(m.start_time), "end_time": hkt_to_utc(m.end_time)}
+                for m in req.meetings
+            ]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid meeting time: {e}")
+
+        try:
+            job = analysis_jobs.submit(run_batch_analysis, user_id, windows, kind="batch-analysis")
+        except JobQueueFull as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Analysis queue is full ({e}), try again shortly",
+                headers={"Retry-After": "30"}
+            )
+
+        logger.info("Queued batch job %s for %d meetings", job["id"], len(windows), extra={"user_id": user_id})
+
+        return {
+            "status": "queued",
+            "message": "Batch analysis queued",
+            "job_id": job["id"],
+            "status_url": f"/jobs/{job['id']}"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Batch analysis error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, timing and (once finished) result of a background job"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 @app.post("/users/register", status_code=201)
 async def register_user(req: UserRegisterRequest):
     """Register a new user or return existing"""
     try:
-        result = supabase_client.table("users").upsert({
+        result = await run_db(supabase_client.table("users").upsert({
             "id": req.user_id
-        }, on_conflict="id").execute()
+        }, on_conflict="id").execute)
         return {"user_id": req.user_id, "registered": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @app.get("/users/{user_id}/meetings", response_model=List[UserMeetingResponse])
-async def get_user_meetings(user_id: str):
+async def get_user_meetings(
+    user_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None)
+):
+    """
+    Meetings a user has joined, most recently joined first.
+    Pages by (joined_at, id); pass the X-Next-Cursor header back as `cursor` for the next page.
+    """
     try:
-        print(f"Fetching meetings for user: {user_id}")
+        logger.debug("Fetching meetings for user %s", user_id)
         
-        result = supabase_client.table("user_meetings").select("""
+        query = supabase_client.table("user_meetings").select("""
+            id,
             meeting_id,
             role,
             joined_at,
@@ -194,17 +484,19 @@ async def get_user_meetings(user_id: str):
                 start_time,
                 end_time
             )
-        """).eq("user_id", user_id).order("joined_at", desc=True).execute()
+        """).eq("user_id", user_id)
+        query = apply_cursor(query, "joined_at", cursor)
+        result = await run_db(query.order("joined_at", desc=True).order("id", desc=True).limit(limit + 1).execute)
         
-        print(f"Query result: {result}")
-        print(f"Data: {result.data}")
+        rows = result.data or []
         
-        if not result.data:
-            print("No meetings found for user")
+        if not rows:
+            logger.debug("No meetings found for user %s", user_id)
             return []
         
+        rows = paginate(rows, limit, "joined_at", response)
         meetings = []
-        for row in result.data:
+        for row in rows:
             meeting = row.get("meetings", {})
             meetings.append({
                 "meeting_id": row["meeting_id"],
@@ -215,22 +507,77 @@ async def get_user_meetings(user_id: str):
                 "joined_at": row["joined_at"]
             })
         
-        print(f"Returning {len(meetings)} meetings")
+        logger.debug("Returning %d meetings for user %s", len(meetings), user_id)
         return meetings
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Get meetings error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Get meetings error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch meetings: {str(e)}")
 
+@app.get("/users/{user_id}/history", response_model=HistoryResponse)
+async def get_user_history(
+    user_id: str,
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    granularity: str = Query("day")
+):
+    """
+    Engagement, category time and focus across a user's meetings, per HKT day or per meeting.
+    Reads the rollup tables maintained by the analyzer, never raw window_events.
+    """
+    if granularity not in ("day", "meeting"):
+        raise HTTPException(status_code=400, detail="granularity must be 'day' or 'meeting'")
+    try:
+        start_day = date.fromisoformat(start_date).isoformat() if start_date else None
+        end_day = date.fromisoformat(end_date).isoformat() if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_date and end_date must be YYYY-MM-DD")
+
+    try:
+        if granularity == "day":
+            query = supabase_client.table("user_daily_rollups").select(
+                "day,meetings,total_duration_sec,engaged_duration_sec,category_durations,focus_streaks,focus_seconds"
+            )
+        else:
+            query = supabase_client.table("user_meeting_rollups").select(
+                "meeting_id,meeting_start,day,total_duration_sec,engaged_duration_sec,category_durations,focus_streaks,focus_seconds"
+            )
+        query = query.eq("user_id", user_id)
+        if start_day:
+            query = query.gte("day", start_day)
+        if end_day:
+            query = query.lte("day", end_day)
+        query = query.order("day") if granularity == "day" else query.order("meeting_start")
+        rows = (await run_db(query.execute)).data or []
+
+        series = []
+        for row in rows:
+            entry = {"day": row["day"]}
+            if granularity == "meeting":
+                entry.update(meeting_id=row["meeting_id"], meeting_start=row["meeting_start"])
+            entry.update(summarize(combine_rollups([row])))
+            series.append(entry)
+
+        return {
+            "user_id": user_id,
+            "granularity": granularity,
+            "summary": summarize(combine_rollups(rows)),
+            "series": series
+        }
+    except Exception as e:
+        logger.exception("History error for user %s: %s", user_id, e)
+        raise HTTPException(status_code=500, detail=f"Failed to fetch history: {str(e)}")
+
 @app.post("/meetings/join")
 async def join_meeting(req: MeetingJoinRequest):
     """Add a user to a meeting"""
     try:
-        result = supabase_client.table("user_meetings").insert({
+        result = await run_db(supabase_client.table("user_meetings").insert({
             "user_id": req.user_id,
             "meeting_id": req.meeting_id
-        }).execute()
+        }).execute)
+        public_meetings_cache.clear()
         return {"success": True, "data": result.data}
     except Exception as e:
         if "unique constraint" in str(e).lower():
@@ -240,49 +587,65 @@ async def join_meeting(req: MeetingJoinRequest):
 @app.post("/meetings", status_code=201)
 async def create_meeting(req: MeetingCreateRequest):
     try:
-        user_check = supabase_client.table("users").select("id").eq("id", req.host_user_id).execute()
+        user_check = await run_db(supabase_client.table("users").select("id").eq("id", req.host_user_id).execute)
         if not user_check.data:
-            supabase_client.table("users").insert({"id": req.host_user_id}).execute()
+            await run_db(supabase_client.table("users").insert({"id": req.host_user_id}).execute)
         
         start_local = datetime.fromisoformat(req.start_time.replace("Z", ""))
         end_local = datetime.fromisoformat(req.end_time.replace("Z", ""))
         
-        meeting_result = supabase_client.table("meetings").insert({
+        meeting_result = await run_db(supabase_client.table("meetings").insert({
             "meetings": req.name,
             "start_time": start_local.isoformat(),  
             "end_time": end_local.isoformat(),
-        }).execute()
+        }).execute)
         
         if not meeting_result.data:
             raise Exception("Failed to create meeting")
         
         meeting_id = meeting_result.data[0]["id"]
         
-        supabase_client.table("user_meetings").insert({
+        await run_db(supabase_client.table("user_meetings").insert({
             "user_id": req.host_user_id,
             "meeting_id": meeting_id,
             "role": "host"
-        }).execute()
+        }).execute)
+        public_meetings_cache.clear()
         
         return {"meeting_id": meeting_id, "name": req.name}
     except Exception as e:
-        print(f"Meeting creation error: {e}")
+        logger.exception("Meeting creation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Creation failed: {str(e)}")
 
 @app.get("/meetings/public", response_model=List[PublicMeetingResponse])
-async def get_public_meetings(user_id: Optional[str] = Query(None)):
+async def get_public_meetings(
+    response: Response,
+    user_id: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None)
+):
     """
-    List all meetings (optionally mark which ones user has joined)
+    List all meetings, latest start first (optionally mark which ones user has joined).
+    Pages by (start_time, id); pass the X-Next-Cursor header back as `cursor` for the next page.
     """
     try:
-        print(f"🔍 GET /meetings/public called with user_id={user_id}")
-        
-        meetings_result = supabase_client.table("meetings").select("""
-            id, meetings, start_time, end_time
-        """).order("start_time", desc=True).limit(100).execute()
-        
-        meetings_data = meetings_result.data or []
-        print(f"     Found {len(meetings_data)} meetings in database")
+        # participant_count is kept up to date by a trigger on user_meetings, and
+        # each listing page is shared by all callers for a few seconds
+        cache_key = (cursor, limit)
+        page = public_meetings_cache.get(cache_key)
+        if page is None:
+            query = supabase_client.table("meetings").select("""
+                id, meetings, start_time, end_time, participant_count
+            """)
+            query = apply_cursor(query, "start_time", cursor)
+            meetings_result = await run_db(query.order("start_time", desc=True).order("id", desc=True).limit(limit + 1).execute)
+            rows = meetings_result.data or []
+            page = (rows[:limit], encode_cursor(rows[limit - 1], "start_time") if len(rows) > limit else None)
+            public_meetings_cache.set(cache_key, page)
+        
+        meetings_data, next_cursor = page
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
 
         if not meetings_data:
@@ -290,31 +653,17 @@ async def get_public_meetings(user_id: Optional[str] = Query(None)):
 
         meeting_ids = [m["id"] for m in meetings_data]
         
-        count_map = defaultdict(int)
-        if meeting_ids:
-            counts_result = supabase_client.table("user_meetings").select(
-                "meeting_id"
-            ).in_("meeting_id", meeting_ids).execute()
-            
-            counts_data = counts_result.data or []
-            for row in counts_data:
-                mid = row.get("meeting_id")
-                if mid:
-                    count_map[mid] += 1
-        
         joined_map = {}
         if user_id:
-            print(f"🔍 Checking joined meetings for user: {user_id}")
-            joined_result = supabase_client.table("user_meetings").select(
+            joined_result = await run_db(supabase_client.table("user_meetings").select(
                 "meeting_id"
-            ).eq("user_id", user_id).in_("meeting_id", meeting_ids).execute()
+            ).eq("user_id", user_id).in_("meeting_id", meeting_ids).execute)
             
             joined_data = joined_result.data or []
             for row in joined_data:
                 mid = row.get("meeting_id")
                 if mid:
                     joined_map[mid] = True
-            print(f" User has joined {len(joined_map)} meetings")
         
 
         meetings = []
@@ -324,38 +673,35 @@ async def get_public_meetings(user_id: Optional[str] = Query(None)):
                 "name": m["meetings"], 
                 "start_time": m["start_time"],
                 "end_time": m["end_time"],
-                "participant_count": count_map.get(m["id"], 0),
+                "participant_count": m.get("participant_count") or 0,
                 "is_joined": joined_map.get(m["id"], False)
             })
         
-        print(f" Returning {len(meetings)} public meetings")
+        logger.debug("Returning %d public meetings", len(meetings), extra={"user_id": user_id, "joined": len(joined_map)})
         return meetings
         
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        print(f" Error in get_public_meetings: {e}")
-        traceback.print_exc()
+        logger.exception("Error in get_public_meetings: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch meetings: {str(e)}")
     
 @app.get("/meetings/{meeting_id}", response_model=MeetingResponse)
 async def get_meeting(meeting_id: str):
     """Get meeting details with participant count"""
     try:
-        meeting_result = supabase_client.table("meetings").select("*").eq("id", meeting_id).single().execute()
+        meeting_result = await run_db(supabase_client.table("meetings").select("*").eq("id", meeting_id).single().execute)
         if not meeting_result.data:
             raise HTTPException(status_code=404, detail="Meeting not found")
         
         meeting = meeting_result.data
         
-
-        count_result = supabase_client.table("user_meetings").select("id", count="exact").eq("meeting_id", meeting_id).execute()
-        
         return MeetingResponse(
             id=meeting["id"],
             name=meeting["meetings"], 
             start_time=meeting["start_time"],
             end_time=meeting["end_time"],
-            participant_count=count_result.count or 0
+            participant_count=meeting.get("participant_count") or 0
         )
     except HTTPException:
         raise
@@ -367,12 +713,238 @@ async def get_meeting(meeting_id: str):
 @app.post("/meetings/{meeting_id}/analyze", response_model=MeetingAnalyticsResponse)
 async def analyze_meeting_endpoint(
     meeting_id: str,
+    request: Request,
+    response: Response,
     start_time: Optional[str] = Query(None),
-    end_time: Optional[str] = Query(None)
+    end_time: Optional[str] = Query(None),
+    bin_minutes: int = Query(5)
 ):
     """
     Analyze ALL users' activity for a meeting.
-    Returns aggregate stats + per-user breakdown.
+    Returns aggregate stats + per-user breakdown, with timelines in `bin_minutes` bins.
+    Results are cached per (meeting_id, time range) until trigger-analysis writes
+    new rows for the meeting; send If-None-Match to get a 304 when unchanged.
+    """
+    check_bin_minutes(bin_minutes)
+    payload, etag = await get_meeting_analytics(meeting_id, start_time, end_time, bin_minutes)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return payload
+
+def check_bin_minutes(bin_minutes: int):
+    if bin_minutes not in TIMELINE_LEVELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"bin_minutes must be one of {', '.join(map(str, TIMELINE_LEVELS))}"
+        )
+
+async def get_meeting_analytics(
+    meeting_id: str,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    bin_minutes: int = 5
+) -> tuple:
+    """
+    (JSON payload, ETag) for a meeting's analytics, served from analytics_cache when possible.
+    The cache also keeps each range's aggregates and TimelinePyramid, so another
+    bin_minutes for the same range only merges already-binned levels.
+    """
+    cache_key = (meeting_id, start_time, end_time, bin_minutes)
+    cached = analytics_cache.get(cache_key)
+    if cached is None:
+        generation = analytics_generation[meeting_id]
+        base_key = (meeting_id, start_time, end_time)
+        base = analytics_cache.get(base_key)
+        if base is None:
+            base = await compute_meeting_analytics(meeting_id, start_time, end_time)
+            if analytics_generation[meeting_id] == generation:
+                analytics_cache.set(base_key, base)
+
+        fields, pyramid = base
+        cached = await run_analytics(render_meeting_analytics, fields, pyramid, bin_minutes)
+        # Don't cache a result computed while new rows were being written
+        if analytics_generation[meeting_id] == generation:
+            analytics_cache.set(cache_key, cached)
+    return cached
+
+def render_meeting_analytics(fields: Dict[str, Any], pyramid: Optional[TimelinePyramid], bin_minutes: int) -> tuple:
+    """(JSON payload, ETag) for computed analytics with the timelines at `bin_minutes`"""
+    with ANALYTICS_STAGE_SECONDS.time(stage="levels"):
+        interval_data, user_interval_data, cohort_heatmap = pyramid.timelines(bin_minutes) if pyramid else ([], {}, {})
+    result = MeetingAnalyticsResponse(
+        **fields,
+        bin_minutes=bin_minutes,
+        interval_data=interval_data,
+        user_interval_data=user_interval_data,
+        cohort_heatmap=cohort_heatmap
+    )
+    payload = jsonable_encoder(result)
+    etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() + '"'
+    return payload, etag
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+def interval_updates(sent: List[Dict[str, Any]], current: List[Dict[str, Any]]):
+    """
+    Bins of `current` that a client holding `sent` still needs, as (index, bin) pairs.
+
+    Returns None when the timeline can't be patched in place (it got shorter or
+    its first bin moved) and the client should replace it wholesale.
+    """
+    if len(current) < len(sent) or (sent and current[0]["time"] != sent[0]["time"]):
+        return None
+    return [(i, b) for i, b in enumerate(current) if i >= len(sent) or sent[i] != b]
+
+def aggregate_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: payload[key] for key in (
+        "total_duration_sec", "engagement_percentage", "category_durations", "avg_focus_seconds"
+    )}
+
+@app.get("/meetings/{meeting_id}/stream")
+async def stream_meeting_analytics(
+    meeting_id: str,
+    request: Request,
+    start_time: Optional[str] = Query(None),
+    end_time: Optional[str] = Query(None),
+    bin_minutes: int = Query(5)
+):
+    """
+    Server-Sent Events feed of a meeting's timeline.
+
+    Sends each new or changed `interval_data` bin as a `bin` event (with its
+    `index`), a `reset` event carrying the whole timeline when it can't be
+    patched, and an `aggregate` event whenever engagement or category totals
+    change. Checks for new analytics every STREAM_POLL_SECONDS; trigger-analysis
+    on this worker makes the next check recompute immediately.
+    """
+    check_bin_minutes(bin_minutes)
+    poll_seconds = float(os.getenv("STREAM_POLL_SECONDS", "2"))
+    keepalive_seconds = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+
+    async def events():
+        sent_bins = []
+        sent_aggregate = None
+        last_etag = None
+        event_id = 0
+        idle = 0.0
+
+        while not await request.is_disconnected():
+            try:
+                payload, etag = await get_meeting_analytics(meeting_id, start_time, end_time, bin_minutes)
+            except HTTPException as e:
+                yield format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+                return
+
+            if etag != last_etag:
+                last_etag = etag
+                idle = 0.0
+                current = payload["interval_data"]
+                updates = interval_updates(sent_bins, current)
+
+                if updates is None:
+                    event_id += 1
+                    yield format_sse("reset", {"interval_data": current}, event_id)
+                else:
+                    for index, b in updates:
+                        event_id += 1
+                        yield format_sse("bin", {"index": index, **b}, event_id)
+                sent_bins = current
+
+                aggregate = aggregate_fields(payload)
+                if aggregate != sent_aggregate:
+                    sent_aggregate = aggregate
+                    event_id += 1
+                    yield format_sse("aggregate", aggregate, event_id)
+            elif idle >= keepalive_seconds:
+                idle = 0.0
+                yield ": keepalive\n\n"
+
+            await asyncio.sleep(poll_seconds)
+            idle += poll_seconds
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def summarize_meeting_rows(cols: EventColumns, meeting_id: str, timer: StageTimer) -> tuple:
+    """
+    compute_meeting_analytics' CPU-bound half: aggregate the fetched rows and
+    build the TimelinePyramid. Runs on the analytics pool.
+    """
+    if not len(cols):
+        return {
+            "meeting_id": meeting_id,
+            "total_duration_sec": 0,
+            "engagement_percentage": 0.0,
+            "category_durations": {},
+            "avg_focus_seconds": 0.0,
+            "user_stats": []
+        }, None
+
+    with timer.stage("aggregate"):
+        agg = aggregate_meeting_rows(cols)
+
+    with timer.stage("timelines"):
+        pyramid = TimelinePyramid(cols, {uid: user["indices"] for uid, user in agg["users"].items()})
+    timer.observe()
+
+    total_duration_sec = agg["total_duration_sec"]
+    cat_durations = agg["category_durations"]
+
+    engaged_duration = cat_durations.get("meeting", 0) + cat_durations.get("work_related", 0)
+    engagement_pct = round(engaged_duration / total_duration_sec * 100, 1) if total_duration_sec > 0 else 0
+
+    focus_durations = agg["focus_durations"]
+    avg_focus_sec = sum(focus_durations) / len(focus_durations) if focus_durations else 0
+
+    user_stats = []
+    for uid, user in agg["users"].items():
+        user_total = user["total_duration_sec"]
+        user_engagement = round(user["engaged_duration_sec"] / user_total * 100, 1) if user_total > 0 else 0
+        user_focus = user["focus_durations"]
+
+        user_stats.append({
+            "user_id": uid,
+            "total_duration_sec": user_total,
+            "engagement_percentage": user_engagement,
+            "category_durations": dict(user["category_durations"]),
+            "avg_focus_seconds": round(sum(user_focus) / len(user_focus)) if user_focus else 0
+        })
+
+    logger.info(
+        "Computed meeting analytics",
+        extra={"meeting_id": meeting_id, "rows": len(cols), "users": len(user_stats), "engagement_pct": engagement_pct}
+    )
+
+    return {
+        "meeting_id": meeting_id,
+        "total_duration_sec": round(total_duration_sec),
+        "engagement_percentage": engagement_pct,
+        "category_durations": dict(cat_durations),
+        "avg_focus_seconds": round(avg_focus_sec),
+        "user_stats": user_stats
+    }, pyramid
+
+async def compute_meeting_analytics(
+    meeting_id: str,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None
+) -> tuple:
+    """
+    Query window_events for a meeting and compute aggregate + per-user analytics.
+    Returns (MeetingAnalyticsResponse fields other than the timelines, TimelinePyramid or None).
     """
     try:
         from datetime import datetime, timezone, timedelta
@@ -393,229 +965,51 @@ async def analyze_meeting_endpoint(
 
                 return dt.astimezone(timezone.utc).isoformat()
             except ValueError as e:
-                print(f"⚠️ Failed to parse timestamp '{ts}': {e}")
+                logger.warning("Failed to parse timestamp %r: %s", ts, e)
                 return None
 
         if not start_time or not end_time:
-            meeting = supabase_client.table("meetings").select("start_time", "end_time").eq("id", meeting_id).single().execute()
+            meeting = await run_db(supabase_client.table("meetings").select("start_time", "end_time").eq("id", meeting_id).single().execute)
             if not meeting.data:
                 raise HTTPException(status_code=404, detail="Meeting not found")
             
             start_time = hkt_to_utc(meeting.data["start_time"])
             end_time = hkt_to_utc(meeting.data["end_time"])
         else:
-
-            print(f"     Converting query params from HKT → UTC:")
-            print(f"     Input: start={start_time}, end={end_time}")
-            
             start_time = hkt_to_utc(start_time)
             end_time = hkt_to_utc(end_time)
-            
-            print(f"   Output: start={start_time}, end={end_time}")
         
         if not start_time or not end_time:
             raise HTTPException(status_code=400, detail="Invalid time range format")
         
-        print(f"    Querying window_events:")
-        print(f"    meeting_id: {meeting_id}")
-        print(f"    timestamp >= {start_time} (UTC)")
-        print(f"    timestamp <= {end_time} (UTC)")
-        
-        query = supabase_client.table("window_events").select("*").eq("meeting_id", meeting_id)
-        
-        if start_time:
-            query = query.gte("timestamp", start_time)
-        if end_time:
-            query = query.lte("timestamp", end_time)
-        
-        query = query.order("timestamp", desc=False)
-        result = query.execute()
-        rows = result.data or []
-        
-        print(f"     Found {len(rows)} window_events for meeting {meeting_id}")
-
-        if not rows:
-            print(f"⚠️ No rows found for meeting_id={meeting_id} in time range")
-            return MeetingAnalyticsResponse(
-                meeting_id=meeting_id,
-                total_duration_sec=0,
-                engagement_percentage=0.0,
-                category_durations={},
-                avg_focus_seconds=0.0,
-                interval_data=[],
-                user_interval_data={},  
-                user_stats=[]
-            )
-
-        users_in_meeting = set(r["user_id"] for r in rows)
-        print(f" Found {len(users_in_meeting)} unique users in meeting")
+        timer = StageTimer(ANALYTICS_STAGE_SECONDS)
 
-        user_interval_data = {}
-        for uid in users_in_meeting:
-            user_rows = [r for r in rows if r["user_id"] == uid]
-            user_interval_data[uid] = build_interval_data(user_rows, meeting_id)
-
-        total_duration_sec = sum(r["duration_seconds"] for r in rows)
-        
-        
-        cat_durations = defaultdict(float)
-        for r in rows:
-            cat_durations[r["category"]] += r["duration_seconds"]
-        
-        engaged_duration = cat_durations.get("meeting", 0) + cat_durations.get("work_related", 0)
-        engagement_pct = round(engaged_duration / total_duration_sec * 100, 1) if total_duration_sec > 0 else 0
-        
-        focus_durations = []
-        current_start = None
-        sorted_rows = sorted(rows, key=lambda x: x["timestamp"])
-        
-        for r in sorted_rows:
-            ts = datetime.fromisoformat(r["timestamp"].replace("Z", "+00:00"))
-            if r["category"] in ("meeting", "work_related"):
-                if current_start is None:
-                    current_start = ts
-            else:
-                if current_start:
-                    dur = (ts - current_start).total_seconds()
-                    if dur > 0:
-                        focus_durations.append(dur)
-                    current_start = None
-        
-        if current_start:
-            last_ts = datetime.fromisoformat(sorted_rows[-1]["timestamp"].replace("Z", "+00:00"))
-            dur = (last_ts - current_start).total_seconds()
-            if dur > 0:
-                focus_durations.append(dur + 300)
-        avg_focus_sec = sum(focus_durations) / len(focus_durations) if focus_durations else 0
-        
-        interval_data = build_interval_data(rows, meeting_id)
-        
-        user_stats = []
-        users_in_meeting = set(r["user_id"] for r in rows)
-        
-        for uid in users_in_meeting:
-            user_rows = [r for r in rows if r["user_id"] == uid]
-            user_total = sum(r["duration_seconds"] for r in user_rows)
-            user_engaged = sum(
-                r["duration_seconds"] for r in user_rows 
-                if r["category"] in ("meeting", "work_related")
-            )
-            user_engagement = round(user_engaged / user_total * 100, 1) if user_total > 0 else 0
-            
-            user_cat_durations = defaultdict(float)
-            for r in user_rows:
-                user_cat_durations[r["category"]] += r["duration_seconds"]
-            
-            user_stats.append({
-                "user_id": uid,
-                "total_duration_sec": user_total,
-                "engagement_percentage": user_engagement,
-                "category_durations": dict(user_cat_durations)
-            })
-        
-        print(f"    Returning analytics: {engagement_pct}% engagement, {len(user_stats)} users")
-        
-        return MeetingAnalyticsResponse(
-            meeting_id=meeting_id,
-            total_duration_sec=round(total_duration_sec),
-            engagement_percentage=engagement_pct,
-            category_durations=dict(cat_durations),
-            avg_focus_seconds=round(avg_focus_sec),
-            interval_data=interval_data,
-            user_interval_data=user_interval_data,
-            user_stats=user_stats
+        # Pages arrive in time order and are parsed into columns while later ones are still being fetched
+        cols = EventColumns()
+        with timer.stage("fetch"):
+            async for page in fetch_window_event_pages(
+                lambda: supabase_client.table("window_events").select(WINDOW_EVENT_COLUMNS).eq("meeting_id", meeting_id),
+                run_db,
+                start_time,
+                end_time,
+                page_size=WINDOW_EVENTS_PAGE_SIZE,
+                concurrency=WINDOW_EVENTS_FETCH_CONCURRENCY
+            ):
+                await run_analytics(cols.extend, page)
+        
+        logger.debug(
+            "Found %d window_events", len(cols),
+            extra={"meeting_id": meeting_id, "start_utc": start_time, "end_utc": end_time}
         )
+
+        return await run_analytics(summarize_meeting_rows, cols, meeting_id, timer)
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f" Analysis error: {e}")
-        traceback.print_exc()
+        logger.exception("Analysis error: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-def build_interval_data(rows: List[Dict], meeting_id: str, bin_minutes: int = 5) -> List[Dict[str, Any]]:
-    """Build 5-minute interval data for timeline visualization (all users combined)"""
-    if not rows:
-        return []
-    
-    from datetime import datetime, timedelta, timezone
-    from collections import defaultdict
-    
-
-    timestamps = []
-    for r in rows:
-        ts_str = r["timestamp"]
-        if ts_str.endswith("Z"):
-            ts_str = ts_str[:-1] + "+00:00"
-        timestamps.append(datetime.fromisoformat(ts_str))
-    
-    if not timestamps:
-        return []
-    
-    start = min(timestamps)
-    end = max(timestamps)
-    
-    start_rounded = start.replace(
-        minute=(start.minute // bin_minutes) * bin_minutes,
-        second=0,
-        microsecond=0
-    )
-
-    hkt_tz = timezone(timedelta(hours=8))
-    
-    interval_data = []
-    current_bin = start_rounded
-    
-    while current_bin < end:
-        bin_end = min(current_bin + timedelta(minutes=bin_minutes), end)
-        bin_total_sec = (bin_end - current_bin).total_seconds()
-        
-        if bin_total_sec <= 0:
-            break
-        
-        bin_events = []
-        for r in rows:
-
-            ev_ts_str = r["timestamp"]
-            if ev_ts_str.endswith("Z"):
-                ev_ts_str = ev_ts_str[:-1] + "+00:00"
-            ev_start = datetime.fromisoformat(ev_ts_str)
-            ev_end = ev_start + timedelta(seconds=r["duration_seconds"])
-            
-            overlap = compute_overlap(ev_start, ev_end, current_bin, bin_end)
-            if overlap > 0:
-                bin_events.append((overlap, r))
-        
-        if bin_events:
-            dominant = max(bin_events, key=lambda x: x[0])
-            _, event = dominant
-            engaged_pct = 100 if event["category"] in ("meeting", "work_related") else 0
-        else:
-            event = {"app": "Unknown", "category": "other", "title": "No activity"}
-            engaged_pct = 0
-        
-        local_bin = current_bin.astimezone(hkt_tz)
-        
-        interval_data.append({
-            "time": local_bin.strftime("%H:%M"),  
-            "category": event.get("category", "other"),
-            "app": event.get("app", "Unknown"),
-            "title": (event.get("title", "—")[:60] + "...") if len(event.get("title", "")) > 60 else event.get("title", "—"),
-            "engaged_pct": engaged_pct
-        })
-        
-        current_bin = bin_end
-    
-    return interval_data
-
-
-def compute_overlap(start1, end1, start2, end2):
-    """Calculate overlap in seconds between two time ranges"""
-    overlap_start = max(start1, start2)
-    overlap_end = min(end1, end2)
-    return max(0, (overlap_end - overlap_start).total_seconds())
-
 @app.get("/test-connection")
 async def test_connection():
     return {"status": "OK", "message": "Backend is running"}
\ No newline at end of file
@@ -0,0 +1,210 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, dict(s, counts=list(s["counts"]))) for key, s in self._series.items())
+
+        lines = []
+        for key, s in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), s["counts"]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(s['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {s['count']}")
+        return lines
+
+
+class StageTimer:
+    """
+    Accumulates wall time per named stage over one run, then records each
+    stage total once, so interleaved stages (e.g. fetching the next chunk
+    between categorizing chunks) still give one sample per stage per run.
+    """
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.totals = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] += time.perf_counter() - t0
+
+    def iter(self, name: str, iterable):
+        """Yield from iterable, charging the time spent producing each item to `name`"""
+        it = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def observe(self):
+        for name, total in self.totals.items():
+            self.histogram.observe(total, stage=name)
+        self.totals.clear()
+
+
+class Registry:
+    """
+    Metrics rendered in the Prometheus text exposition format.
+
+    Besides Counter/Histogram instances, collectors can be registered: callables
+    returning (name, type, help, [(labels dict, value), ...]) tuples read at
+    scrape time, for numbers other components already keep (cache hits, queue
+    depth) without double-counting them here.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[tuple]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+
+        for collector in collectors:
+            for name, type_, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type_}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Pipeline metrics shared by analyzer.py and main.py
+ANALYSIS_STAGE_SECONDS = REGISTRY.histogram(
+    "analysis_stage_seconds", "Time per analyze_meeting stage per run", ("stage",)
+)
+ANALYSIS_SECONDS = REGISTRY.histogram("analysis_seconds", "Total analyze_meeting run time")
+ANALYSIS_EVENTS = REGISTRY.counter("analysis_events_processed_total", "ActivityWatch window events analyzed")
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "Ollama categorization requests", ("kind", "outcome"))
+LLM_REQUEST_SECONDS = REGISTRY.histogram("llm_request_seconds", "Ollama categorization request latency", ("kind",))
+ROWS_WRITTEN = REGISTRY.counter("supabase_rows_written_total", "Interval rows upserted to window_events")
+FAILED_BATCHES = REGISTRY.counter("supabase_failed_batches_total", "window_events upsert batches that failed")
+ANALYTICS_STAGE_SECONDS = REGISTRY.histogram(
+    "analytics_stage_seconds", "Time per meeting analytics stage per request", ("stage",)
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds", "HTTP request latency until the response starts", ("method", "path", "status")
+)
+
+
+def cache_collector(prefix: str, cache) -> Callable[[], List[tuple]]:
+    """Collector exposing a cache's own hits/misses counters"""
+    def collect():
+        return [
+            (f"{prefix}_hits_total", "counter", f"{prefix} lookups that hit", [({}, cache.hits)]),
+            (f"{prefix}_misses_total", "counter", f"{prefix} lookups that missed", [({}, cache.misses)]),
+        ]
+    return collect
@@ -0,0 +1,237 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from aggregation import FocusStreaks
+from binning import EPOCH, to_microseconds
+from columnar import parse_timestamp
+from window_events import to_filter_timestamp
+
+logger = logging.getLogger(__name__)
+
+HKT = timezone(timedelta(hours=8))
+ROLLUP_PAGE_SIZE = 1000
+FOCUS_CATEGORIES = ("meeting", "work_related")
+
+
+def fetch_user_meeting_rows(supabase, user_id: str, meeting_id: str) -> List[dict]:
+    """All stored interval rows for one user in one meeting, keyset-paged on timestamp (unique per user/meeting)"""
+    rows = []
+    last = None
+    while True:
+        query = supabase.table("window_events").select(
+            "user_id,timestamp,duration_seconds,category,app"
+        ).eq("user_id", user_id).eq("meeting_id", meeting_id)
+        if last is not None:
+            query = query.gt("timestamp", last)
+        page = query.order("timestamp").limit(ROLLUP_PAGE_SIZE).execute().data or []
+        rows.extend(page)
+        if len(page) < ROLLUP_PAGE_SIZE:
+            return rows
+        last = to_filter_timestamp(page[-1]["timestamp"])
+
+
+def timestamp_us(ts: str) -> int:
+    return to_microseconds(parse_timestamp(ts))
+
+
+def format_timestamp(ts_us: int) -> str:
+    return (EPOCH + timedelta(microseconds=ts_us)).isoformat().replace("+00:00", "Z")
+
+
+class RollupAccumulator:
+    """
+    One user's meeting totals over stored rows added in timestamp order, with
+    the same engagement and focus-streak rules as aggregate_meeting_rows.
+    Can start from a checkpoint (the state just before some row) instead of
+    from nothing.
+    """
+
+    def __init__(self, checkpoint: Optional[dict] = None):
+        state = checkpoint or {}
+        self.total_duration_sec = state.get("total_duration_sec", 0)
+        self.engaged_duration_sec = state.get("engaged_duration_sec", 0)
+        self.category_durations = dict(state.get("category_durations") or {})
+        self.focus_streaks = state.get("focus_streaks", 0)
+        self.focus_seconds = state.get("focus_seconds", 0.0)
+        self.focus = FocusStreaks()
+        if state.get("focus_open_since"):
+            self.focus.current_start = timestamp_us(state["focus_open_since"])
+
+    def add(self, row: dict):
+        dur = row["duration_seconds"]
+        cat = row["category"]
+        focused = cat in FOCUS_CATEGORIES
+        self.total_duration_sec += dur
+        if focused:
+            self.engaged_duration_sec += dur
+        self.category_durations[cat] = self.category_durations.get(cat, 0.0) + dur
+        self.focus.add(timestamp_us(row["timestamp"]), focused, dur)
+
+    def checkpoint(self, timestamp: str) -> dict:
+        """State to resume from at the row starting at `timestamp` (the next row to be added)"""
+        open_since = self.focus.current_start
+        return {
+            "timestamp": timestamp,
+            "total_duration_sec": self.total_duration_sec,
+            "engaged_duration_sec": self.engaged_duration_sec,
+            "category_durations": dict(self.category_durations),
+            "focus_streaks": self.focus_streaks + len(self.focus.durations),
+            "focus_seconds": self.focus_seconds + sum(self.focus.durations),
+            "focus_open_since": format_timestamp(open_since) if open_since is not None else None
+        }
+
+    def totals(self) -> dict:
+        durations = self.focus.finish()
+        return {
+            "total_duration_sec": self.total_duration_sec,
+            "engaged_duration_sec": self.engaged_duration_sec,
+            "category_durations": self.category_durations,
+            "focus_streaks": self.focus_streaks + len(durations),
+            "focus_seconds": self.focus_seconds + sum(durations)
+        }
+
+
+def accumulate_rows(rows: List[dict], checkpoint: Optional[dict] = None) -> tuple:
+    """
+    (totals, checkpoint) over time-ordered rows, optionally continuing from a
+    checkpoint. The returned checkpoint is taken just before the last row, the
+    bin an incremental run starts by rewriting.
+    """
+    acc = RollupAccumulator(checkpoint)
+    for row in rows[:-1]:
+        acc.add(row)
+    resume = acc.checkpoint(format_timestamp(timestamp_us(rows[-1]["timestamp"])))
+    acc.add(rows[-1])
+    return acc.totals(), resume
+
+
+def rollup_row(user_id: str, meeting_id: str, meeting_start: str, day: str, totals: dict, checkpoint: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "meeting_id": meeting_id,
+        "meeting_start": meeting_start,
+        "day": day,
+        **totals,
+        "checkpoint": checkpoint,
+        "updated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    }
+
+
+def meeting_rollup(user_id: str, meeting_id: str, rows: List[dict]) -> Optional[dict]:
+    """user_meeting_rollups row for one user's stored intervals in a meeting (None if there are none)"""
+    if not rows:
+        return None
+
+    rows = sorted(rows, key=lambda r: timestamp_us(r["timestamp"]))
+    totals, checkpoint = accumulate_rows(rows)
+    started = parse_timestamp(rows[0]["timestamp"]).astimezone(timezone.utc)
+    return rollup_row(
+        user_id, meeting_id, started.isoformat().replace("+00:00", "Z"),
+        started.astimezone(HKT).date().isoformat(), totals, checkpoint
+    )
+
+
+def resume_meeting_rollup(user_id: str, meeting_id: str, previous: dict, rows: List[dict], resume_from: datetime) -> Optional[dict]:
+    """
+    Extend a stored rollup with the rows an incremental run just wrote from
+    `resume_from` on, without re-reading the meeting. None when the stored
+    checkpoint isn't at `resume_from` (an older rollup, a failed refresh or a
+    re-analyzed earlier range), in which case the rollup has to be rebuilt.
+    """
+    checkpoint = previous.get("checkpoint")
+    if not checkpoint or not rows:
+        return None
+    at = timestamp_us(checkpoint["timestamp"])
+    if at != to_microseconds(resume_from) or timestamp_us(rows[0]["timestamp"]) != at:
+        return None
+
+    totals, checkpoint = accumulate_rows(rows, checkpoint)
+    return rollup_row(user_id, meeting_id, previous["meeting_start"], previous["day"], totals, checkpoint)
+
+
+def combine_rollups(rows: List[dict]) -> Dict[str, Any]:
+    """Sum rollup rows (meeting- or day-level) into one set of totals"""
+    totals = {
+        "meetings": 0,
+        "total_duration_sec": 0.0,
+        "engaged_duration_sec": 0.0,
+        "category_durations": {},
+        "focus_streaks": 0,
+        "focus_seconds": 0.0
+    }
+    for row in rows:
+        totals["meetings"] += row.get("meetings", 1)
+        totals["total_duration_sec"] += row["total_duration_sec"]
+        totals["engaged_duration_sec"] += row["engaged_duration_sec"]
+        totals["focus_streaks"] += row["focus_streaks"]
+        totals["focus_seconds"] += row["focus_seconds"]
+        for cat, dur in (row["category_durations"] or {}).items():
+            totals["category_durations"][cat] = totals["category_durations"].get(cat, 0.0) + dur
+    return totals
+
+
+def summarize(totals: Dict[str, Any]) -> Dict[str, Any]:
+    """Engagement %, category durations and average focus in the shape the analytics endpoint uses"""
+    total = totals["total_duration_sec"]
+    return {
+        "meetings": totals["meetings"],
+        "total_duration_sec": round(total),
+        "engagement_percentage": round(totals["engaged_duration_sec"] / total * 100, 1) if total > 0 else 0.0,
+        "category_durations": totals["category_durations"],
+        "avg_focus_seconds": round(totals["focus_seconds"] / totals["focus_streaks"]) if totals["focus_streaks"] else 0
+    }
+
+
+def refresh_daily_rollup(supabase, user_id: str, day: str):
+    """Rebuild user_daily_rollups for one day from that day's meeting rollups"""
+    meetings = supabase.table("user_meeting_rollups").select(
+        "total_duration_sec,engaged_duration_sec,category_durations,focus_streaks,focus_seconds"
+    ).eq("user_id", user_id).eq("day", day).execute().data or []
+
+    if not meetings:
+        supabase.table("user_daily_rollups").delete().eq("user_id", user_id).eq("day", day).execute()
+        return
+
+    supabase.table("user_daily_rollups").upsert({
+        "user_id": user_id,
+        "day": day,
+        **combine_rollups(meetings),
+        "updated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    }, on_conflict="user_id,day").execute()
+
+
+def refresh_rollups(supabase, user_id: str, meeting_id: str, rows: Optional[List[dict]] = None, resume_from: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Update the user's rollup for a meeting, then the daily rollup(s) it feeds.
+
+    An incremental run passes the rows it saved and the watermark it resumed
+    from; the rollup then continues from its stored checkpoint, so the cost
+    follows the rows written rather than the meeting's length. Otherwise (or
+    when the checkpoint doesn't line up) it is rebuilt from all stored
+    intervals. Either way the old values are replaced, never added to, so
+    re-analyzing a range never double counts.
+    """
+    previous = supabase.table("user_meeting_rollups").select("day,meeting_start,checkpoint").eq(
+        "user_id", user_id
+    ).eq("meeting_id", meeting_id).execute().data or []
+
+    rollup = None
+    if resume_from is not None and previous:
+        rollup = resume_meeting_rollup(user_id, meeting_id, previous[0], rows, resume_from)
+    resumed = rollup is not None
+    if rollup is None:
+        rollup = meeting_rollup(user_id, meeting_id, fetch_user_meeting_rows(supabase, user_id, meeting_id))
+    if rollup is None:
+        return None
+
+    supabase.table("user_meeting_rollups").upsert(rollup, on_conflict="user_id,meeting_id").execute()
+
+    days = {rollup["day"]} | {row["day"] for row in previous}
+    for day in days:
+        refresh_daily_rollup(supabase, user_id, day)
+
+    logger.debug("Refreshed rollups", extra={
+        "user_id": user_id, "meeting_id": meeting_id, "days": sorted(days), "resumed": resumed
+    })
+    return rollup
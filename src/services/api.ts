@@ -26,12 +26,15 @@ export interface PublicMeeting {
   is_joined: boolean;
 }
 
+export type BinMinutes = 1 | 5 | 15 | 60;
+
 export interface MeetingAnalytics {
   meeting_id: string;
   total_duration_sec: number;
   engagement_percentage: number;
   category_durations: Record<string, number>;
   avg_focus_seconds: number;
+  bin_minutes: BinMinutes;
   interval_data: Array<{
     time: string;
     category: string;
@@ -44,7 +47,14 @@ export interface MeetingAnalytics {
     total_duration_sec: number;
     engagement_percentage: number;
     category_durations: Record<string, number>;
+    avg_focus_seconds?: number;
   }>;
+  cohort_heatmap?: {
+    times: string[];
+    user_ids: string[];
+    engaged_seconds: number[][];
+    dominant_category: Array<Array<string | null>>;
+  };
   user_interval_data?: Record<
     string,
     Array<{
@@ -67,11 +77,91 @@ export const registerUser = async (userId: string) => {
   return res.json();
 };
 
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+export interface PageParams {
+  limit?: number;
+  cursor?: string;
+}
+
+const fetchPage = async <T>(
+  url: URL,
+  page: PageParams,
+  errorMessage: string,
+): Promise<Page<T>> => {
+  if (page.limit) url.searchParams.set("limit", String(page.limit));
+  if (page.cursor) url.searchParams.set("cursor", page.cursor);
+
+  const res = await fetch(url.toString());
+  if (!res.ok) throw new Error(errorMessage);
+  return {
+    items: await res.json(),
+    nextCursor: res.headers.get("X-Next-Cursor"),
+  };
+};
+
+export const getUserMeetingsPage = (
+  userId: string,
+  page: PageParams = {},
+): Promise<Page<UserMeeting>> =>
+  fetchPage(
+    new URL(`${API_BASE}/users/${userId}/meetings`),
+    page,
+    "Failed to fetch meetings",
+  );
+
 export const getUserMeetings = async (
   userId: string,
 ): Promise<UserMeeting[]> => {
-  const res = await fetch(`${API_BASE}/users/${userId}/meetings`);
-  if (!res.ok) throw new Error("Failed to fetch meetings");
+  const meetings: UserMeeting[] = [];
+  let cursor: string | undefined;
+  do {
+    const page = await getUserMeetingsPage(userId, { cursor });
+    meetings.push(...page.items);
+    cursor = page.nextCursor ?? undefined;
+  } while (cursor);
+  return meetings;
+};
+
+export interface HistoryStats {
+  meetings: number;
+  total_duration_sec: number;
+  engagement_percentage: number;
+  category_durations: Record<string, number>;
+  avg_focus_seconds: number;
+}
+
+export interface UserHistory {
+  user_id: string;
+  granularity: "day" | "meeting";
+  summary: HistoryStats;
+  series: Array<
+    HistoryStats & {
+      day: string;
+      meeting_id?: string;
+      meeting_start?: string;
+    }
+  >;
+}
+
+export const getUserHistory = async (
+  userId: string,
+  params: {
+    startDate?: string;
+    endDate?: string;
+    granularity?: "day" | "meeting";
+  } = {},
+): Promise<UserHistory> => {
+  const url = new URL(`${API_BASE}/users/${userId}/history`);
+  if (params.startDate) url.searchParams.set("start_date", params.startDate);
+  if (params.endDate) url.searchParams.set("end_date", params.endDate);
+  if (params.granularity) url.searchParams.set("granularity", params.granularity);
+
+  const res = await fetch(url.toString());
+  if (!res.ok) throw new Error("Failed to fetch history");
   return res.json();
 };
 
@@ -111,21 +201,94 @@ export const getMeeting = async (meetingId: string): Promise<Meeting> => {
   return res.json();
 };
 
+// Last analytics body and its ETag per analyze URL, so polls can revalidate
+// with If-None-Match and reuse the body on a 304 instead of re-downloading it
+const analyticsByUrl = new Map<string, { etag: string; body: MeetingAnalytics }>();
+
 export const analyzeMeeting = async (params: {
   meeting_id: string;
   start_time?: string;
   end_time?: string;
-}) => {
+  bin_minutes?: BinMinutes;
+}): Promise<MeetingAnalytics> => {
   const searchParams = new URLSearchParams();
   if (params.start_time) searchParams.set("start_time", params.start_time);
   if (params.end_time) searchParams.set("end_time", params.end_time);
+  if (params.bin_minutes)
+    searchParams.set("bin_minutes", String(params.bin_minutes));
 
-  const res = await fetch(
-    `${API_BASE}/meetings/${params.meeting_id}/analyze?${searchParams}`,
-    { method: "POST" },
-  );
+  const url = `${API_BASE}/meetings/${params.meeting_id}/analyze?${searchParams}`;
+  const cached = analyticsByUrl.get(url);
+  const res = await fetch(url, {
+    method: "POST",
+    headers: cached ? { "If-None-Match": cached.etag } : {},
+  });
+  if (res.status === 304 && cached) return cached.body;
   if (!res.ok) throw new Error("Analysis failed");
-  return res.json() as Promise<MeetingAnalytics>;
+
+  const body = (await res.json()) as MeetingAnalytics;
+  const etag = res.headers.get("ETag");
+  if (etag) analyticsByUrl.set(url, { etag, body });
+  else analyticsByUrl.delete(url);
+  return body;
+};
+
+export type IntervalBin = MeetingAnalytics["interval_data"][number];
+
+export type MeetingAggregate = Pick<
+  MeetingAnalytics,
+  | "total_duration_sec"
+  | "engagement_percentage"
+  | "category_durations"
+  | "avg_focus_seconds"
+>;
+
+export const streamMeetingAnalytics = (
+  params: {
+    meeting_id: string;
+    start_time?: string;
+    end_time?: string;
+    bin_minutes?: BinMinutes;
+  },
+  handlers: {
+    onTimeline: (intervalData: IntervalBin[]) => void;
+    onAggregate?: (aggregate: MeetingAggregate) => void;
+    onError?: (detail: string) => void;
+  },
+) => {
+  const searchParams = new URLSearchParams();
+  if (params.start_time) searchParams.set("start_time", params.start_time);
+  if (params.end_time) searchParams.set("end_time", params.end_time);
+  if (params.bin_minutes)
+    searchParams.set("bin_minutes", String(params.bin_minutes));
+
+  const source = new EventSource(
+    `${API_BASE}/meetings/${params.meeting_id}/stream?${searchParams}`,
+  );
+  let timeline: IntervalBin[] = [];
+
+  source.addEventListener("bin", (e) => {
+    const { index, ...bin } = JSON.parse((e as MessageEvent).data);
+    timeline = [...timeline];
+    timeline[index] = bin;
+    handlers.onTimeline(timeline);
+  });
+  source.addEventListener("reset", (e) => {
+    timeline = JSON.parse((e as MessageEvent).data).interval_data;
+    handlers.onTimeline(timeline);
+  });
+  source.addEventListener("aggregate", (e) => {
+    handlers.onAggregate?.(JSON.parse((e as MessageEvent).data));
+  });
+  source.addEventListener("error", (e) => {
+    const data = (e as MessageEvent).data;
+    if (data) {
+      handlers.onError?.(JSON.parse(data).detail);
+      source.close();
+    }
+  });
+
+  return () => source.close();
 };
 
 export const getMeetingFocus = async (params: {
@@ -149,6 +312,7 @@ export const triggerMeetingAnalysis = async (params: {
   user_id: string;
   start_time: string;
   end_time: string;
+  incremental?: boolean;
 }) => {
   const res = await fetch(
     `${API_BASE}/meetings/${params.meeting_id}/trigger-analysis`,
@@ -159,6 +323,7 @@ export const triggerMeetingAnalysis = async (params: {
         user_id: params.user_id,
         start_time: params.start_time,
         end_time: params.end_time,
+        incremental: params.incremental ?? false,
       }),
     },
   );
@@ -168,18 +333,70 @@ export const triggerMeetingAnalysis = async (params: {
     throw new Error(error.detail || "Failed to trigger analysis");
   }
 
+  const { job_id } = await res.json();
+  return waitForJob(job_id);
+};
+
+export const triggerBatchAnalysis = async (
+  userId: string,
+  meetings: Array<{ meeting_id: string; start_time: string; end_time: string }>,
+) => {
+  const res = await fetch(`${API_BASE}/users/${userId}/trigger-analysis`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ meetings }),
+  });
+
+  if (!res.ok) {
+    const error = await res.json().catch(() => ({}));
+    throw new Error(error.detail || "Failed to trigger batch analysis");
+  }
+
+  const { job_id } = await res.json();
+  return waitForJob(job_id);
+};
+
+export interface AnalysisJob {
+  id: string;
+  kind: string;
+  status: "queued" | "running" | "completed" | "partial" | "failed";
+  submitted_at: number;
+  started_at: number | null;
+  finished_at: number | null;
+  queue_seconds: number | null;
+  run_seconds: number | null;
+  result: any;
+  error: string | null;
+}
+
+export const getJob = async (jobId: string): Promise<AnalysisJob> => {
+  const res = await fetch(`${API_BASE}/jobs/${jobId}`);
+  if (!res.ok) throw new Error("Failed to fetch job status");
   return res.json();
 };
 
-export const getPublicMeetings = async (
+export const waitForJob = async (jobId: string, intervalMs = 1000) => {
+  while (true) {
+    const job = await getJob(jobId);
+    if (job.status === "completed") return job.result;
+    if (job.status === "failed" || job.status === "partial") {
+      throw new Error(job.error || "Analysis failed");
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
+export const getPublicMeetingsPage = (
   userId?: string,
-): Promise<PublicMeeting[]> => {
+  page: PageParams = {},
+): Promise<Page<PublicMeeting>> => {
   const url = new URL(`${API_BASE}/meetings/public`);
   if (userId) {
     url.searchParams.set("user_id", userId);
   }
-
-  const res = await fetch(url.toString());
-  if (!res.ok) throw new Error("Failed to fetch public meetings");
-  return res.json();
+  return fetchPage(url, page, "Failed to fetch public meetings");
 };
+
+export const getPublicMeetings = async (
+  userId?: string,
+): Promise<PublicMeeting[]> => (await getPublicMeetingsPage(userId)).items;
@@ -0,0 +1,185 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+for module in ("aw_client", "aw_core", "ollama", "supabase", "dotenv"):
+    pytest.importorskip(module)
+
+os.environ["CATEGORY_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="test-analyzer-"), "categories.sqlite3")
+
+import analyzer  # noqa: E402
+from columnar import parse_timestamp  # noqa: E402
+from fakes import FakeActivityWatch, FakeSupabase  # noqa: E402
+from metrics import StageTimer  # noqa: E402
+
+START = datetime(2024, 1, 15, 1, 0, tzinfo=timezone.utc)
+
+
+class FailingUpsert:
+    """Supabase stand-in whose window_events upserts fail once `ok` runs out"""
+
+    def __init__(self, ok: int = 0):
+        self.ok = ok
+        self.upserts = 0
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.upserts += 1
+        return self
+
+    def execute(self):
+        if self.ok <= 0:
+            raise RuntimeError("upsert failed")
+        self.ok -= 1
+
+
+def records(minutes: int) -> list:
+    out = []
+    for i in range(minutes):
+        ev = analyzer.Event(timestamp=START + timedelta(minutes=i), duration=timedelta(minutes=1), data={"app": "Code", "title": "main.py"})
+        rec = analyzer.EventRecord(ev)
+        rec.category = "work_related"
+        out.append(rec)
+    return out
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"watermark": 0, "rollups": 0}
+    monkeypatch.setattr(analyzer, "save_watermark", lambda *a: calls.__setitem__("watermark", calls["watermark"] + 1))
+    monkeypatch.setattr(analyzer, "refresh_rollups", lambda *a: calls.__setitem__("rollups", calls["rollups"] + 1))
+    return calls
+
+
+def process(minutes: int):
+    end = START + timedelta(minutes=minutes)
+    return analyzer.process_meeting_events([records(minutes)], START, end, "alice", "m1", StageTimer(analyzer.ANALYSIS_STAGE_SECONDS))
+
+
+def test_failed_upserts_are_reported_and_skip_watermark_and_rollups(monkeypatch, calls):
+    fake = FailingUpsert(ok=0)
+    monkeypatch.setattr(analyzer, "get_supabase_client", lambda: fake)
+
+    write = process(3)[-1]
+
+    assert write["rows_written"] == 0
+    assert len(write["failed_batches"]) == 1
+    assert write["failed_batches"][0]["rows"] == 3
+    assert calls == {"watermark": 0, "rollups": 0}
+
+
+def test_failed_batch_does_not_stop_later_batches(monkeypatch):
+    fake = FailingUpsert(ok=1)
+    monkeypatch.setattr(analyzer, "get_supabase_client", lambda: fake)
+    rows = [
+        {"timestamp": (START + timedelta(minutes=i)).isoformat(), "app": "Code", "category": "work_related", "duration_seconds": 60}
+        for i in range(5)
+    ]
+
+    write = analyzer.save_events_to_supabase("alice", "m1", rows, batch_size=2)
+
+    assert fake.upserts == 3
+    assert write["rows_written"] == 2
+    assert [(b["batch"], b["rows"]) for b in write["failed_batches"]] == [(1, 2), (2, 1)]
+
+
+def test_successful_save_moves_watermark_and_refreshes_rollups(monkeypatch, calls):
+    monkeypatch.setattr(analyzer, "get_supabase_client", lambda: FailingUpsert(ok=10))
+
+    write = process(3)[-1]
+
+    assert write == {"rows_written": 3, "failed_batches": []}
+    assert calls == {"watermark": 1, "rollups": 1}
+
+
+def work_events(start: datetime, minutes: int) -> list:
+    return [
+        analyzer.Event(timestamp=start + timedelta(minutes=i), duration=timedelta(minutes=1), data={"app": "Code", "title": "main.py"})
+        for i in range(minutes)
+    ]
+
+
+def test_incremental_runs_stop_at_the_current_time(monkeypatch, supabase):
+    now = [START + timedelta(minutes=20)]
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now[0]
+
+    monkeypatch.setattr(analyzer, "datetime", Clock)
+    monkeypatch.setattr(analyzer, "_supabase", supabase)
+    start, end = START.isoformat(), (START + timedelta(hours=1)).isoformat()
+
+    # 20 minutes into an hour-long meeting, then 20 minutes later
+    monkeypatch.setattr(analyzer, "client", FakeActivityWatch(work_events(START, 20)))
+    analyzer.analyze_meeting(start, end, "alice", "m1", incremental=True)
+    stored = supabase.tables["window_events"]
+    assert max(parse_timestamp(r["timestamp"]) for r in stored) == START + timedelta(minutes=19)
+
+    now[0] = START + timedelta(minutes=40)
+    monkeypatch.setattr(analyzer, "client", FakeActivityWatch(work_events(START, 40)))
+    analyzer.analyze_meeting(start, end, "alice", "m1", incremental=True)
+
+    assert sorted(parse_timestamp(r["timestamp"]) for r in stored) == [START + timedelta(minutes=i) for i in range(40)]
+    assert {r["category"] for r in stored} == {"work_related"}
+    assert parse_timestamp(supabase.tables["analysis_watermarks"][0]["watermark"]) == START + timedelta(minutes=39)
+
+
+def event(start: datetime, seconds: float, app: str, title: str):
+    return analyzer.Event(timestamp=start, duration=timedelta(seconds=seconds), data={"app": app, "title": title})
+
+
+def batch_events() -> list:
+    apps = [("zoom.us", "Zoom Meeting"), ("Code", "main.py"), ("Google Chrome", "general - slack.com")]
+    events = [event(START + timedelta(seconds=45 * i), 40, *apps[i % 3]) for i in range(400)]
+    return events + [
+        # Across the back-to-back boundary at 01:30 and the start of the 02:10 meeting
+        event(START + timedelta(minutes=29, seconds=50), 30, "Code", "boundary.py"),
+        event(START + timedelta(minutes=65), 7 * 60, "zoom.us", "Zoom Meeting"),
+        # From before the first meeting into it, so it reaches past shorter events after it
+        event(START - timedelta(minutes=10), 12 * 60, "Code", "early.py"),
+        # Long events overlapping two meeting windows that don't touch
+        event(START + timedelta(minutes=95), 30 * 60, "Code", "long.py"),
+        event(START + timedelta(minutes=130), 40 * 60, "zoom.us", "Zoom Meeting"),
+    ]
+
+
+def stored_by_meeting(supabase) -> dict:
+    by_meeting = {}
+    for row in supabase.tables.get("window_events", []):
+        by_meeting.setdefault(row["meeting_id"], []).append({k: v for k, v in row.items() if k != "id"})
+    return {m: sorted(rows, key=lambda r: r["timestamp"]) for m, rows in by_meeting.items()}
+
+
+def test_batch_analysis_matches_analyzing_each_meeting_alone(monkeypatch):
+    monkeypatch.setattr(analyzer, "client", FakeActivityWatch(batch_events()))
+    windows = {
+        "back-to-back-1": (0, 30), "back-to-back-2": (30, 60), "apart": (70, 100),
+        "long-1": (120, 140), "long-2": (160, 180), "empty": (400, 420)
+    }
+    meetings = [
+        {"meeting_id": m, "start_time": (START + timedelta(minutes=a)).isoformat(), "end_time": (START + timedelta(minutes=b)).isoformat()}
+        for m, (a, b) in windows.items()
+    ]
+
+    batch_db = FakeSupabase()
+    monkeypatch.setattr(analyzer, "_supabase", batch_db)
+    results = analyzer.analyze_meetings("alice", meetings)
+
+    single_db = FakeSupabase()
+    monkeypatch.setattr(analyzer, "_supabase", single_db)
+    for m in meetings:
+        single = analyzer.analyze_meeting(m["start_time"], m["end_time"], "alice", m["meeting_id"])
+        batch = results[m["meeting_id"]]
+        assert batch[:3] + batch[4:] == single[:3] + single[4:], m["meeting_id"]
+        if single[3] is not None:
+            assert list(batch[3]) == list(single[3]), m["meeting_id"]
+
+    assert results["empty"][0] is None
+    assert stored_by_meeting(batch_db) == stored_by_meeting(single_db)
+    assert set(stored_by_meeting(batch_db)) == set(windows) - {"empty"}
@@ -0,0 +1,67 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from binning import StreamingBinner, bin_intervals, floor_to_bin
+
+CATEGORIES = ["meeting", "work_related", "instant_message", "other"]
+START = datetime(2024, 1, 15, 1, 0, tzinfo=timezone.utc)
+
+
+def scan_bins(intervals: list, start: datetime, end: datetime, bin_minutes: int) -> list:
+    """The per-bin scan over every interval that the sweep replaced"""
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    bins = []
+    current = floor_to_bin(start, bin_minutes)
+    while current < end:
+        bin_end = min(current + timedelta(minutes=bin_minutes), end)
+        category_durations = defaultdict(float)
+        dominant, max_overlap = None, 0
+        for i in order:
+            ev_start, ev_end, category = intervals[i]
+            overlap = max(0, (min(ev_end, bin_end) - max(ev_start, current)).total_seconds())
+            if overlap > 0:
+                category_durations[category] += overlap
+                if overlap > max_overlap:
+                    dominant, max_overlap = i, overlap
+        bins.append({"start": current, "end": bin_end, "category_durations": dict(category_durations), "dominant": dominant})
+        current = bin_end
+    return bins
+
+
+def random_intervals(rng: random.Random) -> list:
+    intervals = []
+    for _ in range(rng.randint(0, 150)):
+        ev_start = START + timedelta(seconds=rng.randint(0, 3 * 3600), microseconds=rng.choice([0, rng.randint(0, 999_999)]))
+        duration = timedelta(seconds=rng.choice([0, 1, 10, 59, 60, 300, 901, 4000]), microseconds=rng.choice([0, 500]))
+        intervals.append((ev_start, ev_start + duration, rng.choice(CATEGORIES)))
+    return intervals
+
+
+@pytest.mark.parametrize("bin_minutes", [1, 5, 7, 15, 60])
+def test_sweep_matches_per_bin_scan(bin_minutes):
+    for seed in range(100):
+        rng = random.Random(seed)
+        intervals = random_intervals(rng)
+        start = START + timedelta(seconds=rng.randint(0, 1800))
+        end = start + timedelta(seconds=rng.randint(0, 3 * 3600))
+
+        swept = [
+            {"start": b["start"], "end": b["end"], "category_durations": dict(b["category_durations"]), "dominant": b["dominant"]}
+            for b in bin_intervals(intervals, start, end, bin_minutes)
+        ]
+        assert swept == scan_bins(intervals, start, end, bin_minutes), seed
+
+
+def test_bins_close_as_soon_as_an_interval_starts_past_them():
+    binner = StreamingBinner(START, START + timedelta(minutes=15), bin_minutes=5)
+    assert binner.add(START, START + timedelta(minutes=2), "meeting", "a") == []
+
+    closed = binner.add(START + timedelta(minutes=11), START + timedelta(minutes=12), "other", "b")
+
+    assert [b["start"] for b in closed] == [START, START + timedelta(minutes=5)]
+    assert closed[0]["dominant"] == "a" and closed[0]["dominant_seconds"] == 120
+    assert closed[1]["dominant"] is None
+    assert [b["dominant"] for b in binner.finish()] == ["b"]
@@ -0,0 +1,39 @@
+from category_cache import CategorizationCache
+
+
+def test_hits_only_write_once_last_used_is_stale(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("category_cache.time.time", lambda: clock[0])
+    cache = CategorizationCache(str(tmp_path / "cache.sqlite3"), touch_interval=60)
+    cache.set("Code", "main.py", "work_related")
+    changes = cache._conn().total_changes
+
+    clock[0] += 30
+    assert cache.get("Code", "main.py") == "work_related"
+    assert cache._conn().total_changes == changes
+
+    clock[0] += 31
+    assert cache.get("Code", "main.py") == "work_related"
+    assert cache._conn().total_changes == changes + 1
+
+
+def test_eviction_runs_every_n_inserts_and_keeps_recent_entries(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("category_cache.time.time", lambda: clock[0])
+    cache = CategorizationCache(str(tmp_path / "cache.sqlite3"), max_entries=5, touch_interval=0, evict_every=4)
+
+    for i in range(7):
+        clock[0] += 1
+        cache.set("app", f"title {i}", "other")
+
+    # The 4th insert trimmed nothing (4 <= 5); the 7 rows wait for the 8th
+    assert cache.stats()["entries"] == 7
+
+    # Used again, so it outlives the entries written after it
+    clock[0] += 1
+    assert cache.get("app", "title 0") == "other"
+    clock[0] += 1
+    cache.set("app", "title 7", "other")
+    assert cache.stats()["entries"] == 5
+    assert cache.get("app", "title 0") == "other"
+    assert [cache.get("app", f"title {i}") for i in range(1, 4)] == [None, None, None]
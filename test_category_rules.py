@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from category_rules import CompiledRuleset, DEFAULT_RULES_PATH
+
+
+def hardcoded_categorize(app: str, title: str):
+    """The heuristics categorize_window_event had before they moved to categorization_rules.json"""
+    meeting_keywords = ['zoom', 'teams', 'meet', 'webex', 'skype', 'facetime']
+    if any(keyword in app or keyword in title for keyword in meeting_keywords):
+        return 'meeting'
+
+    browsers = ['chrome', 'firefox', 'safari', 'edge', 'brave', 'opera', 'vivaldi']
+    if any(browser in app for browser in browsers):
+        meeting_url_patterns = [
+            'meet.google.com', 'zoom.us/j/', 'zoom.us/w/',
+            'teams.microsoft.com', 'webex.com', 'whereby.com',
+            'jitsi.meet', 'bluejeans.com', '8x8.com'
+        ]
+        meeting_title_keywords = [
+            'google meet', 'zoom meeting', 'microsoft teams',
+            'webex meeting', 'video call', 'join meeting',
+            'meeting invitation', 'conference call'
+        ]
+        if any(p in title for p in meeting_url_patterns) or any(k in title for k in meeting_title_keywords):
+            return 'meeting'
+
+        im_patterns = ['slack.com', 'discord.com', 'telegram.org', 'web.whatsapp.com', 'messenger.com']
+        if any(p in title for p in im_patterns):
+            return 'instant_message'
+
+    dev_tools = ['code', 'vscode', 'intellij', 'pycharm', 'sublime', 'atom', 'terminal']
+    if any(tool in app for tool in dev_tools):
+        return 'work_related'
+    return None
+
+
+def scan_rules(config: dict, app: str, title: str):
+    """Rules checked one by one with plain substring tests"""
+    groups = {name: any(p.lower() in app for p in patterns if p) for name, patterns in config.get("app_groups", {}).items()}
+    for rule in config["rules"]:
+        if rule.get("requires") and not groups[rule["requires"]]:
+            continue
+        if any(p and p.lower() in app for p in rule.get("app", [])) or any(p and p.lower() in title for p in rule.get("title", [])):
+            return rule["category"]
+    return None
+
+
+FRAGMENTS = [
+    "zoom", "zoom.us/j/123", "teams", "meet", "meet.google.com", "google meet", "webex meeting", "chrome",
+    "google chrome", "firefox", "edge", "slack.com", "discord.com", "code", "visual studio code", "pycharm",
+    "terminal", "iterm", "notes", "preview", "spotify", "video call", "conference call", "8x8.com", "me", "te",
+    "zo", "jitsi.meet", "web.whatsapp.com", "会议", ""
+]
+
+
+def random_text(rng: random.Random) -> str:
+    return rng.choice([" ", " - ", "/", ""]).join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 3)))
+
+
+def test_default_rules_match_hardcoded_heuristics():
+    ruleset = CompiledRuleset.from_file(DEFAULT_RULES_PATH)
+    rng = random.Random(0)
+    for _ in range(5000):
+        app, title = random_text(rng), random_text(rng)
+        assert ruleset.categorize(app, title) == hardcoded_categorize(app, title), (app, title)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_rules_match_rule_by_rule_scan(seed):
+    rng = random.Random(seed)
+    alphabet = "abc."
+
+    def word(max_len: int = 4) -> str:
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(1, max_len)))
+
+    config = {
+        "app_groups": {"g": [word() for _ in range(rng.randint(1, 3))]},
+        "rules": [
+            {
+                "category": f"cat{i}",
+                **({"requires": "g"} if rng.random() < 0.3 else {}),
+                "app": [word() for _ in range(rng.randint(0, 3))],
+                "title": [word() for _ in range(rng.randint(0, 3))]
+            }
+            for i in range(rng.randint(1, 5))
+        ]
+    }
+    ruleset = CompiledRuleset(config)
+    for _ in range(300):
+        app, title = word(8), word(8)
+        assert ruleset.categorize(app, title) == scan_rules(config, app, title), (config, app, title)
+
+
+def test_unknown_app_group_is_rejected():
+    with pytest.raises(ValueError):
+        CompiledRuleset({"rules": [{"category": "meeting", "requires": "browser", "title": ["meet"]}]})
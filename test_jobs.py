@@ -0,0 +1,36 @@
+import time
+
+from jobs import JobQueue
+
+
+def wait(queue: JobQueue, job_id: str) -> dict:
+    for _ in range(500):
+        job = queue.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_status_follows_result_status():
+    queue = JobQueue(workers=1)
+    ok = queue.submit(lambda: {"status": "completed"})
+    partial = queue.submit(lambda: {"status": "partial", "message": "1 batch failed"})
+    failed = queue.submit(lambda: {"status": "failed", "message": "nothing saved"})
+
+    assert wait(queue, ok["id"])["status"] == "completed"
+
+    job = wait(queue, partial["id"])
+    assert (job["status"], job["error"]) == ("partial", "1 batch failed")
+    assert job["result"] == {"status": "partial", "message": "1 batch failed"}
+
+    assert wait(queue, failed["id"])["status"] == "failed"
+
+
+def test_raising_job_fails():
+    def boom():
+        raise RuntimeError("boom")
+
+    queue = JobQueue(workers=1)
+    job = wait(queue, queue.submit(boom)["id"])
+    assert (job["status"], job["error"], job["result"]) == ("failed", "boom", None)
@@ -0,0 +1,82 @@
+import asyncio
+import os
+
+import pytest
+
+for module in ("fastapi", "pydantic", "aw_client", "aw_core", "ollama", "supabase", "dotenv"):
+    pytest.importorskip(module)
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test.test.test")
+
+import main  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+from fakes import FakeSupabase  # noqa: E402
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    jobs = []
+    monkeypatch.setattr(main.analysis_jobs, "submit", lambda fn, *args, kind: jobs.append(args) or {"id": "job-1"})
+    return jobs
+
+
+def trigger(meeting_id: str, user_id: str = "alice"):
+    req = main.TriggerAnalysisRequest(user_id=user_id, start_time="2024-01-15T09:00:00", end_time="2024-01-15T10:00:00", incremental=False)
+    return asyncio.run(main.trigger_analysis_endpoint(meeting_id, req))
+
+
+def test_trigger_analysis_unknown_meeting_is_404(monkeypatch, submitted):
+    monkeypatch.setattr(main, "supabase_client", FakeSupabase(meetings=[{"id": "m1"}], users=[{"id": "alice"}]))
+
+    with pytest.raises(HTTPException) as e:
+        trigger("missing")
+
+    assert e.value.status_code == 404
+    assert submitted == []
+
+
+def test_trigger_analysis_registers_unknown_user(monkeypatch, submitted):
+    fake = FakeSupabase(meetings=[{"id": "m1"}], users=[])
+    monkeypatch.setattr(main, "supabase_client", fake)
+
+    assert trigger("m1", "bob")["job_id"] == "job-1"
+
+    assert [u["id"] for u in fake.tables["users"]] == ["bob"]
+    assert [args[:2] for args in submitted] == [("m1", "bob")]
+
+
+def analysis_result(rows_written: int, failed_batches: list) -> tuple:
+    interval_data = [{"time": "09:00"}] * 3
+    return 3600.0, 50.0, {"work_related": 1800.0}, [], 600.0, interval_data, {
+        "rows_written": rows_written, "failed_batches": failed_batches
+    }
+
+
+def failed_batch(batch: int) -> dict:
+    return {"batch": batch, "first_timestamp": "", "last_timestamp": "", "rows": 1, "error": "upsert failed"}
+
+
+def test_job_result_completed_when_every_batch_saved():
+    result = main.analysis_job_result("m1", "alice", analysis_result(3, []))
+    assert result["status"] == "completed"
+    assert result["rows_written"] == 3
+
+
+def test_job_result_partial_or_failed_when_batches_fail():
+    partial = main.analysis_job_result("m1", "alice", analysis_result(2, [failed_batch(1)]))
+    assert partial["status"] == "partial"
+    assert partial["failed_batches"] == [failed_batch(1)]
+
+    failed = main.analysis_job_result("m1", "alice", analysis_result(0, [failed_batch(0)]))
+    assert failed["status"] == "failed"
+    assert failed["rows_written"] == 0
+
+
+def test_failed_save_keeps_cached_analytics():
+    main.analytics_cache.set(("m1", None, None, 5), ({}, '"etag"'))
+    main.analysis_job_result("m1", "alice", analysis_result(0, [failed_batch(0)]))
+    assert main.analytics_cache.get(("m1", None, None, 5)) is not None
+
+    main.analysis_job_result("m1", "alice", analysis_result(3, []))
+    assert main.analytics_cache.get(("m1", None, None, 5)) is None
@@ -0,0 +1,145 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import timeline
+from aggregation import aggregate_meeting_rows
+from columnar import EventColumns
+
+CATEGORIES = ["meeting", "work_related", "instant_message", "other"]
+START = datetime(2024, 1, 15, 1, 0, tzinfo=timezone.utc)
+
+
+def random_rows(rng: random.Random, row_minutes: int = None) -> list:
+    """
+    window_events rows for a few users. With row_minutes they look like stored
+    bins (aligned, at most row_minutes long); otherwise starts and durations are arbitrary.
+    """
+    rows = []
+    for u in range(rng.randint(1, 5)):
+        ts = START + timedelta(minutes=rng.randint(0, 40), seconds=rng.randint(0, 59))
+        if row_minutes:
+            ts -= timedelta(minutes=ts.minute % row_minutes, seconds=ts.second)
+        for k in range(rng.randint(1, 60)):
+            if rng.random() < 0.1:
+                ts += timedelta(minutes=rng.randint(1, 10) * (row_minutes or 1))
+            if row_minutes:
+                step = row_minutes * 60
+                duration = step if rng.random() < 0.9 else rng.randint(1, step)
+            else:
+                step = rng.choice([10, 30, 60, 300])
+                duration = rng.choice([10, 30, 45, 60, 300, 301.5])
+            rows.append({
+                "user_id": f"user-{u}",
+                "timestamp": ts.isoformat(),
+                "duration_seconds": duration,
+                "category": rng.choice(CATEGORIES),
+                "app": rng.choice("abcde"),
+                "title": rng.choice(["x", "y", "z" * 70])
+            })
+            ts += timedelta(seconds=step)
+    rng.shuffle(rows)
+    return rows
+
+
+def user_indices(cols: EventColumns) -> dict:
+    return {uid: user["indices"] for uid, user in aggregate_meeting_rows(cols)["users"].items()}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(timeline, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("row_minutes", [1, 5, 15, None])
+def test_pyramid_levels_match_direct_binning(engine, row_minutes):
+    for seed in range(25):
+        cols = EventColumns.from_rows(random_rows(random.Random(seed), row_minutes))
+        indices = user_indices(cols)
+        pyramid = timeline.TimelinePyramid(cols, indices)
+        assert pyramid.mergeable == (row_minutes == 1)
+
+        # Coarsest first, so every merged level is built through the ones below it
+        for bin_minutes in reversed(timeline.TIMELINE_LEVELS):
+            direct = timeline.build_meeting_timelines(cols, indices, "m", bin_minutes)
+            assert pyramid.timelines(bin_minutes) == direct, (seed, bin_minutes)
+
+
+def test_single_row_opens_one_bin_per_level():
+    cols = EventColumns.from_rows([{
+        "user_id": "alice", "timestamp": "2024-01-15T01:07:00+00:00", "duration_seconds": 60,
+        "category": "meeting", "app": "zoom.us", "title": "Standup"
+    }])
+    pyramid = timeline.TimelinePyramid(cols, user_indices(cols))
+    for bin_minutes in timeline.TIMELINE_LEVELS:
+        interval_data, _, _ = pyramid.timelines(bin_minutes)
+        assert interval_data == timeline.build_meeting_timelines(cols, user_indices(cols), "m", bin_minutes)[0]
+
+
+def comparable(summaries: list) -> list:
+    return [
+        (
+            b["start"], b["seconds"], b["dominant"], pytest.approx(b["engaged"], abs=1e-6),
+            {code: (pytest.approx(c["seconds"], abs=1e-6), c["row"], c["row_seconds"]) for code, c in b["categories"].items()}
+        )
+        for b in summaries
+    ]
+
+
+@pytest.mark.parametrize("bin_minutes", [1, 5, 10, 15, 60])
+def test_numpy_engine_matches_python_engine(bin_minutes):
+    pytest.importorskip("numpy")
+    for seed in range(60):
+        cols = EventColumns.from_rows(random_rows(random.Random(seed), None if seed % 2 else 1))
+        indices = user_indices(cols)
+
+        meeting, users, cohort = timeline._timeline_bins_numpy(cols, indices, bin_minutes)
+        ref_meeting, ref_users, ref_cohort = timeline._timeline_bins_python(cols, indices, bin_minutes)
+
+        assert comparable(meeting) == comparable(ref_meeting), seed
+        assert {uid: comparable(b) for uid, b in users.items()} == {uid: comparable(b) for uid, b in ref_users.items()}, seed
+        assert {uid: comparable(b) for uid, b in cohort.items()} == {uid: comparable(b) for uid, b in ref_cohort.items()}, seed
+
+
+def minute_rows(categories: list) -> list:
+    """One user's stored 1-minute rows from 01:00, one per category"""
+    return [
+        {
+            "user_id": "alice", "timestamp": (START + timedelta(minutes=m)).isoformat(), "duration_seconds": 60,
+            "category": category, "app": category, "title": f"minute {m}"
+        }
+        for m, category in enumerate(categories)
+    ]
+
+
+def test_coarse_bins_take_the_category_with_the_most_seconds(engine):
+    # One work minute, then an hour of chat (the last row only closes the range)
+    cols = EventColumns.from_rows(minute_rows(["work_related"] + ["instant_message"] * 60))
+    pyramid = timeline.TimelinePyramid(cols, user_indices(cols))
+    assert pyramid.mergeable
+
+    interval_data, user_interval_data, heatmap = pyramid.timelines(60)
+    assert [(e["category"], e["title"]) for e in interval_data] == [("instant_message", "minute 1")]
+    assert interval_data[0]["engaged_pct"] == pytest.approx(100 / 60)
+    assert user_interval_data["alice"] == interval_data
+    assert heatmap["dominant_category"] == [["instant_message"]]
+    assert heatmap["engaged_seconds"] == [[60.0]]
+
+    interval_data, _, _ = pyramid.timelines(5)
+    assert [e["category"] for e in interval_data] == ["instant_message"] * 12
+    assert [e["engaged_pct"] for e in interval_data] == [pytest.approx(20)] + [0] * 11
+
+
+def test_coarse_bin_ties_go_to_the_category_seen_first(engine):
+    cols = EventColumns.from_rows(minute_rows(["instant_message", "meeting", "meeting", "instant_message", "other"]))
+    pyramid = timeline.TimelinePyramid(cols, user_indices(cols))
+
+    interval_data, _, _ = pyramid.timelines(15)
+    assert [(e["category"], e["title"]) for e in interval_data] == [("instant_message", "minute 0")]
+    assert interval_data[0]["engaged_pct"] == pytest.approx(50)
+    assert pyramid.timelines(15) == timeline.build_meeting_timelines(cols, user_indices(cols), "m", 15)
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fakes import FakeSupabase
+from window_events import fetch_window_event_pages
+
+START = datetime(2024, 1, 15, 1, 0, tzinfo=timezone.utc)
+
+
+def stored_rows(count: int) -> list:
+    """window_events rows for two users, a few sharing a timestamp"""
+    return [
+        {"id": f"row-{i:04d}", "user_id": f"user-{i % 2}", "meeting_id": "m1", "timestamp": (START + timedelta(seconds=20 * (i // 3))).isoformat()}
+        for i in range(count)
+    ]
+
+
+async def run(fn):
+    return fn()
+
+
+def fetch_ids(supabase: FakeSupabase, page_size: int, concurrency: int) -> list:
+    async def fetch():
+        ids = []
+        async for page in fetch_window_event_pages(
+            lambda: supabase.table("window_events").select("*").eq("meeting_id", "m1"), run,
+            START.isoformat(), (START + timedelta(hours=1)).isoformat(), page_size=page_size, concurrency=concurrency
+        ):
+            ids.extend(row["id"] for row in page)
+        return ids
+    return asyncio.run(fetch())
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+@pytest.mark.parametrize("max_rows", [None, 7, 1000])
+def test_pages_come_back_complete_even_when_the_server_caps_them(max_rows, concurrency):
+    rows = stored_rows(250)
+    supabase = FakeSupabase(max_rows=max_rows, window_events=rows)
+
+    assert fetch_ids(supabase, page_size=50, concurrency=concurrency) == [row["id"] for row in rows]
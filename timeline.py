@@ -0,0 +1,358 @@
+from datetime import timedelta, timezone
+from typing import Any, Dict, List
+
+from binning import StreamingBinner, floor_to_bin, iter_bin_edges, to_microseconds
+from columnar import EventColumns
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HKT = timezone(timedelta(hours=8))
+FOCUS_CATEGORIES = ("meeting", "work_related")
+NO_ACTIVITY = ("other", "Unknown", "No activity")
+# Resolutions a TimelinePyramid serves; each one is a multiple of the one before
+TIMELINE_LEVELS = (1, 5, 15, 60)
+
+
+def interval_entry(label: str, category: str, app: str, title: str, engaged_pct: float) -> Dict[str, Any]:
+    return {
+        "time": label,
+        "category": category,
+        "app": app,
+        "title": (title[:60] + "...") if len(title) > 60 else title,
+        "engaged_pct": engaged_pct
+    }
+
+
+def row_fields(cols: EventColumns, i: int) -> tuple:
+    return (
+        cols.categories.values[cols.category[i]],
+        cols.apps.values[cols.app[i]],
+        cols.titles.values[cols.title[i]]
+    )
+
+
+def bin_rows(cols: EventColumns, indices, start, end, bin_minutes: int) -> List[dict]:
+    bins = StreamingBinner(start, end, bin_minutes=bin_minutes)
+    if not bins.edges:
+        return []
+
+    closed = []
+    for i in indices:
+        closed.extend(bins.add_us(cols.start_us[i], cols.end_us[i], cols.category[i], i))
+    closed.extend(bins.finish())
+    return closed
+
+
+def build_interval_data(cols: EventColumns, meeting_id: str, bin_minutes: int = 5, indices=None) -> List[Dict[str, Any]]:
+    """Build 5-minute interval data for timeline visualization (all users combined, or just `indices`)"""
+    if indices is None:
+        indices = range(len(cols))
+    if not indices:
+        return []
+
+    # Columns are time-sorted, so the first and last index bound the range
+    start = cols.timestamp(indices[0])
+    end = cols.timestamp(indices[-1])
+    return render_entries(cols, summarize_bins(bin_rows(cols, indices, start, end, bin_minutes), focused_category_codes(cols)))
+
+
+def focused_category_codes(cols: EventColumns) -> set:
+    return {cols.categories.codes.get(c) for c in FOCUS_CATEGORIES} - {None}
+
+
+def more_seconds(a: dict, b: dict, key: str) -> bool:
+    """Whether `a` has more `key` seconds than `b`, the earlier row winning ties (to the microsecond)"""
+    return (round(a[key], 6), -a["row"]) > (round(b[key], 6), -b["row"])
+
+
+def bin_summary(start, seconds: float, categories: Dict[int, dict], focused_codes) -> dict:
+    """
+    The summary a timeline bin is rendered from. `categories` maps each category
+    code to its total `seconds` in the bin and the `row` with the largest overlap
+    (`row_seconds`). The dominant category is the one with the most seconds, and
+    `dominant` is its longest row.
+    """
+    dominant = None
+    for c in categories.values():
+        if dominant is None or more_seconds(c, dominant, "seconds"):
+            dominant = c
+    return {
+        "start": start,
+        "seconds": seconds,
+        "categories": categories,
+        "engaged": sum((c["seconds"] for code, c in categories.items() if code in focused_codes), 0.0),
+        "dominant": dominant["row"] if dominant is not None else None
+    }
+
+
+def summarize_bins(bins: List[dict], focused_codes) -> List[dict]:
+    """StreamingBinner bins -> bin summaries (see bin_summary)"""
+    return [
+        bin_summary(b["start"], b["seconds"], {
+            code: {"seconds": d, "row": b["category_dominant"][code][0], "row_seconds": b["category_dominant"][code][1]}
+            for code, d in b["category_durations"].items()
+        }, focused_codes)
+        for b in bins
+    ]
+
+
+def _timeline_bins_python(cols: EventColumns, user_indices: Dict[str, Any], bin_minutes: int):
+    """Pure-Python bin summaries: meeting-wide, per user over the user's own range, and per user on the meeting grid"""
+    focused_codes = focused_category_codes(cols)
+    start = cols.timestamp(0)
+    end = cols.timestamp(len(cols) - 1)
+
+    meeting = summarize_bins(bin_rows(cols, range(len(cols)), start, end, bin_minutes), focused_codes)
+    users = {
+        uid: summarize_bins(bin_rows(cols, indices, cols.timestamp(indices[0]), cols.timestamp(indices[-1]), bin_minutes), focused_codes)
+        for uid, indices in user_indices.items()
+    }
+    cohort = {
+        uid: summarize_bins(bin_rows(cols, indices, start, end, bin_minutes), focused_codes)
+        for uid, indices in user_indices.items()
+    }
+    return meeting, users, cohort
+
+
+def _dominant(groups, overlaps, events):
+    """For each group, the event with the largest overlap (earliest event on ties) and that overlap"""
+    order = np.lexsort((events, -overlaps, groups))
+    g = groups[order]
+    first = np.ones(len(g), dtype=bool)
+    first[1:] = g[1:] != g[:-1]
+    return g[first], events[order][first], overlaps[order][first]
+
+
+def _group_categories(groups, overlaps, events, cat) -> Dict[int, Dict[int, dict]]:
+    """bin_summary `categories` for each group, from (group, event, overlap in µs) triples"""
+    ncat = int(cat.max()) + 1
+    keys = groups * ncat + cat[events]
+    # Both come back sorted by key, so they line up
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    seconds = np.bincount(inverse, weights=overlaps) / 1_000_000
+    _, rows, row_overlaps = _dominant(keys, overlaps, events)
+
+    categories = {}
+    for key, s, row, row_us in zip(uniq.tolist(), seconds.tolist(), rows.tolist(), row_overlaps.tolist()):
+        categories.setdefault(key // ncat, {})[key % ncat] = {"seconds": s, "row": row, "row_seconds": row_us / 1_000_000}
+    return categories
+
+
+def _timeline_bins_numpy(cols: EventColumns, user_indices: Dict[str, Any], bin_minutes: int):
+    """The same bin summaries as _timeline_bins_python, from one batched computation over a users × bins matrix"""
+    n = len(cols)
+    start = cols.timestamp(0)
+    end = cols.timestamp(n - 1)
+    edges = list(iter_bin_edges(start, end, bin_minutes))
+    uids = list(user_indices)
+    nbins, nusers = len(edges), len(uids)
+
+    if not edges:
+        return [], {uid: [] for uid in uids}, {uid: [] for uid in uids}
+
+    width = bin_minutes * 60 * 1_000_000
+    grid0 = to_microseconds(edges[0][0])
+    grid_end = to_microseconds(end)
+
+    s = np.array(cols.start_us, dtype=np.int64)
+    e = np.array(cols.end_us, dtype=np.int64)
+    cat = np.array(cols.category, dtype=np.int64)
+    # Users are numbered in user_indices order so matrix rows line up with uids
+    user_row = {cols.users.codes[uid]: r for r, uid in enumerate(uids)}
+    user = np.array([user_row[u] for u in cols.user], dtype=np.int64)
+
+    user_start = np.full(nusers, np.iinfo(np.int64).max)
+    user_end = np.zeros(nusers, dtype=np.int64)
+    np.minimum.at(user_start, user, s)
+    np.maximum.at(user_end, user, s)
+
+    # Explode every event into one (event, bin) pair per grid bin it touches
+    clipped = np.minimum(e, grid_end)
+    valid = clipped > s
+    ev_ids = np.nonzero(valid)[0]
+    first_bin = (s[ev_ids] - grid0) // width
+    last_bin = (clipped[ev_ids] - 1 - grid0) // width
+    counts = last_bin - first_bin + 1
+    ev = np.repeat(ev_ids, counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    bin_idx = np.repeat(first_bin, counts) + (np.arange(len(ev)) - offsets)
+
+    bin_start = grid0 + bin_idx * width
+    bin_end = np.minimum(bin_start + width, grid_end)
+    overlap_global = np.minimum(e[ev], bin_end) - np.maximum(s[ev], bin_start)
+    # A user's own timeline stops at that user's last row, so clip to it as well
+    overlap_user = np.minimum(np.minimum(e[ev], user_end[user[ev]]), bin_end) - np.maximum(s[ev], bin_start)
+
+    focused_codes = focused_category_codes(cols)
+
+    def summary(b, categories, range_end_us=grid_end):
+        bin_start_us = grid0 + b * width
+        seconds = (min(bin_start_us + width, range_end_us) - bin_start_us) / 1_000_000
+        return bin_summary(edges[b][0], seconds, categories or {}, focused_codes)
+
+    # Meeting-wide timeline
+    keep = overlap_global > 0
+    by_bin = _group_categories(bin_idx[keep], overlap_global[keep], ev[keep], cat) if keep.any() else {}
+    meeting = [summary(b, by_bin.get(b)) for b in range(nbins)]
+
+    # Per-user timelines over each user's own [floor(first row), last row) range
+    keep = overlap_user > 0
+    by_group = _group_categories(user[ev[keep]] * nbins + bin_idx[keep], overlap_user[keep], ev[keep], cat) if keep.any() else {}
+    users = {}
+    for r, uid in enumerate(uids):
+        first = int((user_start[r] - grid0) // width)
+        span = int(user_end[r] - (grid0 + first * width))
+        count = -(-span // width) if span > 0 else 0
+        users[uid] = [summary(b, by_group.get(r * nbins + b), int(user_end[r])) for b in range(first, first + count)]
+
+    # Every user on the shared meeting-wide grid, for the cohort heatmap
+    keep = overlap_global > 0
+    by_group = _group_categories(user[ev[keep]] * nbins + bin_idx[keep], overlap_global[keep], ev[keep], cat) if keep.any() else {}
+    cohort = {uid: [summary(b, by_group.get(r * nbins + b)) for b in range(nbins)] for r, uid in enumerate(uids)}
+    return meeting, users, cohort
+
+
+def timeline_bins(cols: EventColumns, user_indices: Dict[str, Any], bin_minutes: int):
+    """
+    (meeting, users, cohort) bin summaries at `bin_minutes`.
+
+    Uses one batched NumPy computation when NumPy is installed (and bins tile
+    the hour evenly); otherwise bins each user separately in pure Python.
+    Both paths give the same bins.
+    """
+    if not len(cols):
+        return [], {uid: [] for uid in user_indices}, {uid: [] for uid in user_indices}
+    if np is not None and 60 % bin_minutes == 0:
+        return _timeline_bins_numpy(cols, user_indices, bin_minutes)
+    return _timeline_bins_python(cols, user_indices, bin_minutes)
+
+
+def coarsen_bins(bins: List[dict], bin_minutes: int, start, end, focused_codes) -> List[dict]:
+    """
+    Merge consecutive finer bin summaries of the range [start, end) into
+    `bin_minutes` bins (aligned within the hour).
+
+    Per-category seconds add up, and each category keeps the row with the
+    largest overlap (earliest row on ties); the dominant category is then picked
+    from the totals as in bin_summary. A row's overlap is only exact when no row
+    spans two finer bins (see rows_fit_bins).
+    """
+    width = timedelta(minutes=bin_minutes)
+    if not bins:
+        # A range too short for any finer bin can still open a coarser one
+        first = floor_to_bin(start, bin_minutes)
+        return [bin_summary(first, (min(first + width, end) - first).total_seconds(), {}, focused_codes)] if first < end else []
+
+    groups = []
+    for b in bins:
+        bin_start = floor_to_bin(b["start"], bin_minutes)
+        if not groups or groups[-1][0] != bin_start:
+            groups.append((bin_start, {}))
+
+        categories = groups[-1][1]
+        for code, c in b["categories"].items():
+            current = categories.get(code)
+            if current is None:
+                categories[code] = dict(c)
+                continue
+            current["seconds"] += c["seconds"]
+            if more_seconds(c, current, "row_seconds"):
+                current["row"], current["row_seconds"] = c["row"], c["row_seconds"]
+
+    return [
+        bin_summary(bin_start, (min(bin_start + width, end) - bin_start).total_seconds(), categories, focused_codes)
+        for bin_start, categories in groups
+    ]
+
+
+def bin_label(b: dict) -> str:
+    return b["start"].astimezone(HKT).strftime("%H:%M")
+
+
+def render_entries(cols: EventColumns, summaries: List[dict]) -> List[Dict[str, Any]]:
+    """interval_data entries: the dominant category's longest row, and engaged seconds as a share of the bin"""
+    return [
+        interval_entry(
+            bin_label(b),
+            *(row_fields(cols, b["dominant"]) if b["dominant"] is not None else NO_ACTIVITY),
+            (b["engaged"] / b["seconds"] * 100) if b["seconds"] > 0 else 0
+        )
+        for b in summaries
+    ]
+
+
+def render_timelines(cols: EventColumns, user_indices: Dict[str, Any], bins) -> tuple:
+    """interval_data, user_interval_data and cohort_heatmap from (meeting, users, cohort) bin summaries"""
+    meeting, users, cohort = bins
+
+    heatmap = {
+        "times": [bin_label(b) for b in meeting],
+        "user_ids": list(user_indices),
+        "engaged_seconds": [[round(b["engaged"], 1) for b in cohort[uid]] for uid in user_indices],
+        "dominant_category": [
+            [cols.categories.values[cols.category[b["dominant"]]] if b["dominant"] is not None else None for b in cohort[uid]]
+            for uid in user_indices
+        ]
+    }
+    return render_entries(cols, meeting), {uid: render_entries(cols, users[uid]) for uid in user_indices}, heatmap
+
+
+def rows_fit_bins(cols: EventColumns, bin_minutes: int) -> bool:
+    """Whether every row lies inside a single `bin_minutes` bin"""
+    width = bin_minutes * 60 * 1_000_000
+    return all(s // width == (e - 1) // width for s, e in zip(cols.start_us, cols.end_us) if e > s)
+
+
+class TimelinePyramid:
+    """
+    A meeting's timelines at every TIMELINE_LEVELS resolution from one sweep.
+
+    The rows are binned once at the finest level; each coarser level is built
+    by merging the level below it (see coarsen_bins) the first time it is
+    asked for, so switching resolution never re-scans the rows. That needs
+    every row to fit in one base bin, which holds for rows written with
+    ANALYSIS_BIN_MINUTES=1; when a row is longer (5-minute rows from older
+    analyses or a coarser ANALYSIS_BIN_MINUTES), each level is binned directly
+    from the rows instead, still once per level.
+    """
+
+    def __init__(self, cols: EventColumns, user_indices: Dict[str, Any]):
+        self.cols = cols
+        self.user_indices = user_indices
+        self.levels = {TIMELINE_LEVELS[0]: timeline_bins(cols, user_indices, TIMELINE_LEVELS[0])}
+        self.mergeable = rows_fit_bins(cols, TIMELINE_LEVELS[0])
+        if len(cols):
+            self.meeting_range = (cols.timestamp(0), cols.timestamp(len(cols) - 1))
+            self.user_ranges = {
+                uid: (cols.timestamp(indices[0]), cols.timestamp(indices[-1])) for uid, indices in user_indices.items()
+            }
+
+    def bins(self, bin_minutes: int):
+        if bin_minutes not in TIMELINE_LEVELS:
+            raise ValueError(f"bin_minutes must be one of {TIMELINE_LEVELS}")
+        if not len(self.cols):
+            return self.levels[TIMELINE_LEVELS[0]]
+        if bin_minutes not in self.levels and not self.mergeable:
+            self.levels[bin_minutes] = timeline_bins(self.cols, self.user_indices, bin_minutes)
+        if bin_minutes not in self.levels:
+            finer = TIMELINE_LEVELS[TIMELINE_LEVELS.index(bin_minutes) - 1]
+            meeting, users, cohort = self.bins(finer)
+            focused_codes = focused_category_codes(self.cols)
+            self.levels[bin_minutes] = (
+                coarsen_bins(meeting, bin_minutes, *self.meeting_range, focused_codes),
+                {uid: coarsen_bins(b, bin_minutes, *self.user_ranges[uid], focused_codes) for uid, b in users.items()},
+                {uid: coarsen_bins(b, bin_minutes, *self.meeting_range, focused_codes) for uid, b in cohort.items()}
+            )
+        return self.levels[bin_minutes]
+
+    def timelines(self, bin_minutes: int) -> tuple:
+        """(interval_data, user_interval_data, cohort_heatmap) at `bin_minutes`"""
+        return render_timelines(self.cols, self.user_indices, self.bins(bin_minutes))
+
+
+def build_meeting_timelines(cols: EventColumns, user_indices: Dict[str, Any], meeting_id: str, bin_minutes: int = 5):
+    """Meeting-wide interval_data, per-user user_interval_data and the cohort heatmap, binned directly at `bin_minutes`"""
+    return render_timelines(cols, user_indices, timeline_bins(cols, user_indices, bin_minutes))
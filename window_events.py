@@ -0,0 +1,90 @@
+import asyncio
+from datetime import timezone
+from typing import Awaitable, Callable, List
+
+from columnar import parse_timestamp
+
+# Only what aggregation and the timelines read (id is the keyset tiebreaker)
+WINDOW_EVENT_COLUMNS = "id,user_id,timestamp,duration_seconds,category,app,title"
+
+
+def to_filter_timestamp(ts: str) -> str:
+    """UTC ISO timestamp with a Z suffix, safe to embed in a PostgREST filter"""
+    return parse_timestamp(ts).astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def split_time_range(start_time: str, end_time: str, parts: int) -> List[tuple]:
+    """Split [start, end] into `parts` contiguous (lower, upper, upper_inclusive) spans"""
+    start = parse_timestamp(start_time).astimezone(timezone.utc)
+    end = parse_timestamp(end_time).astimezone(timezone.utc)
+    if end <= start or parts <= 1:
+        return [(to_filter_timestamp(start_time), to_filter_timestamp(end_time), True)]
+
+    step = (end - start) / parts
+    bounds = [start + step * i for i in range(parts)] + [end]
+    return [
+        (to_filter_timestamp(lo.isoformat()), to_filter_timestamp(hi.isoformat()), i == parts - 1)
+        for i, (lo, hi) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+async def fetch_window_event_pages(
+    make_query: Callable,
+    run: Callable[..., Awaitable],
+    start_time: str,
+    end_time: str,
+    page_size: int = 1000,
+    concurrency: int = 4
+):
+    """
+    Yield pages of window_events rows in (timestamp, id) order.
+
+    The time range is split into `concurrency` spans that are fetched at the
+    same time, each with keyset pagination on (timestamp, id), so a meeting of
+    any size comes back complete without PostgREST's row cap truncating it and
+    without offsets drifting while new rows are upserted. Pages are yielded in
+    time order as soon as every earlier span is done, so callers can aggregate
+    while later pages are still in flight.
+
+    `make_query()` must return a fresh select on window_events (with whatever
+    equality filters apply) and `run(fn)` must execute a blocking call off the
+    event loop. A span is done only when a page comes back empty, since a page
+    shorter than `page_size` may just be cut by the server's max-rows setting.
+    """
+    spans = split_time_range(start_time, end_time, concurrency)
+    queues = [asyncio.Queue(maxsize=2) for _ in spans]
+
+    async def fetch_span(lower: str, upper: str, upper_inclusive: bool, out: asyncio.Queue):
+        try:
+            last = None
+            while True:
+                query = make_query().gte("timestamp", lower)
+                query = query.lte("timestamp", upper) if upper_inclusive else query.lt("timestamp", upper)
+                if last is not None:
+                    ts, row_id = last
+                    query = query.or_(f"timestamp.gt.{ts},and(timestamp.eq.{ts},id.gt.{row_id})")
+                query = query.order("timestamp").order("id").limit(page_size)
+
+                result = await run(query.execute)
+                page = result.data or []
+                if not page:
+                    break
+                await out.put(page)
+                last = (to_filter_timestamp(page[-1]["timestamp"]), page[-1]["id"])
+            await out.put(None)
+        except Exception as e:
+            await out.put(e)
+
+    tasks = [asyncio.create_task(fetch_span(*span, q)) for span, q in zip(spans, queues)]
+    try:
+        for q in queues:
+            while True:
+                page = await q.get()
+                if page is None:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()